@@ -8,6 +8,9 @@ class Point(models.Model):
     Used in the scoring system to track guard performance.
     """
     
+    class Reason(models.TextChoices):
+        INSUFFICIENT_POSITIONS = "INSUFFICIENT_POSITIONS", "Insufficient positions"
+    
     guard = models.ForeignKey(
         'Guard',
         on_delete=models.CASCADE,
@@ -22,6 +25,13 @@ class Point(models.Model):
     explanation = models.TextField(
         help_text="Reason for awarding/deducting points"
     )
+    reason = models.CharField(
+        max_length=25,
+        choices=Reason.choices,
+        null=True,
+        blank=True,
+        help_text="Type of point, set where points are looked up by type (empty otherwise)"
+    )
     
     class Meta:
         verbose_name_plural = "Points"
@@ -29,6 +39,7 @@ class Point(models.Model):
         indexes = [
             models.Index(fields=['date_awarded']),
             models.Index(fields=['guard', 'date_awarded']),
+            models.Index(fields=['reason', 'date_awarded']),
         ]
     
     def __str__(self):
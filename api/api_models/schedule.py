@@ -573,7 +573,7 @@ def _generate_positions_for_exhibition(exhibition, period_start, period_end, set
         if not nwd.is_full_day and nwd.non_working_shift == NonWorkingDay.ShiftType.AFTERNOON
     )
     
-    created_count = 0
+    new_positions = []
     current_date = period_start
     
     while current_date <= period_end:
@@ -614,27 +614,30 @@ def _generate_positions_for_exhibition(exhibition, period_start, period_end, set
             for _ in range(exhibition.number_of_positions):
                 # Morning shift (skip if non-working)
                 if current_date not in non_working_morning:
-                    Position.objects.create(
+                    new_positions.append(Position(
                         exhibition=exhibition,
                         date=current_date,
                         start_time=morning_start,
                         end_time=morning_end
-                    )
-                    created_count += 1
+                    ))
                 
                 # Afternoon shift (skip if non-working)
                 if current_date not in non_working_afternoon:
-                    Position.objects.create(
+                    new_positions.append(Position(
                         exhibition=exhibition,
                         date=current_date,
                         start_time=afternoon_start,
                         end_time=afternoon_end
-                    )
-                    created_count += 1
+                    ))
         
         current_date += timedelta(days=1)
 
-    return created_count
+    # One multi-row INSERT instead of one per position. bulk_create skips post_save,
+    # so invalidate the schedule cache for the new dates here.
+    Position.objects.bulk_create(new_positions)
+    _invalidate_schedule_cache_for_dates({position.date for position in new_positions})
+
+    return len(new_positions)
 
 
 def _generate_missing_positions(exhibition, period_start, period_end, settings):
@@ -913,17 +916,28 @@ def _invalidate_schedule_cache_for_position(position):
     Ensures the assigned/this-week and assigned/next-week endpoints
     return fresh data that includes all current positions.
     """
+    _invalidate_schedule_cache_for_dates([position.date])
+
+
+def _invalidate_schedule_cache_for_dates(dates):
+    """
+    Invalidate schedule cache for every week touched by the given position dates.
+    Used directly after bulk_create, which does not send post_save.
+    """
+    if not dates:
+        return
+
     from django.core.cache import cache
     from .system_settings import SystemSettings
 
     settings = SystemSettings.get_active()
 
     if settings.this_week_start and settings.this_week_end:
-        if settings.this_week_start <= position.date <= settings.this_week_end:
+        if any(settings.this_week_start <= d <= settings.this_week_end for d in dates):
             cache.delete(f'schedule_this_week_{settings.this_week_start.isoformat()}')
 
     if settings.next_week_start and settings.next_week_end:
-        if settings.next_week_start <= position.date <= settings.next_week_end:
+        if any(settings.next_week_start <= d <= settings.next_week_end for d in dates):
             cache.delete(f'schedule_next_week_{settings.next_week_start.isoformat()}')
 
 
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-16 20:57
+
+from django.db import migrations, models
+
+
+def set_insufficient_positions_reason(apps, schema_editor):
+    """Tag existing insufficient-positions penalties by their explanation prefix."""
+    Point = apps.get_model("api", "Point")
+    Point.objects.filter(
+        explanation__startswith="Kazna za nedovoljno upisanih smjena"
+    ).update(reason="INSUFFICIENT_POSITIONS")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0022_user_last_mobile_login"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="point",
+            name="reason",
+            field=models.CharField(
+                blank=True,
+                choices=[("INSUFFICIENT_POSITIONS", "Insufficient positions")],
+                help_text="Type of point, set where points are looked up by type (empty otherwise)",
+                max_length=25,
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="point",
+            index=models.Index(
+                fields=["reason", "date_awarded"], name="api_point_reason_0ff7df_idx"
+            ),
+        ),
+        migrations.RunPython(
+            set_insufficient_positions_reason, migrations.RunPython.noop
+        ),
+    ]
@@ -6,6 +6,7 @@ Provides comprehensive test data for guards, positions, preferences, and system
 import pytest
 from datetime import date, time, timedelta
 from decimal import Decimal
+from django.db import transaction
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password
 
@@ -15,8 +16,7 @@ from api.api_models import (
 )
 
 
-@pytest.fixture
-def system_settings_for_assignment(db):
+def _create_system_settings_for_assignment():
     """
     SystemSettings configured for next week assignment testing.
     
@@ -52,8 +52,7 @@ def system_settings_for_assignment(db):
     return settings
 
 
-@pytest.fixture
-def sample_exhibitions(db, system_settings_for_assignment):
+def _create_sample_exhibitions():
     """Create sample exhibitions for testing."""
     today = timezone.now()
     
@@ -87,6 +86,87 @@ def sample_exhibitions(db, system_settings_for_assignment):
     return [exhibition1, exhibition2, exhibition3]
 
 
+@pytest.fixture
+def system_settings_for_assignment(db):
+    """SystemSettings configured for next week assignment testing."""
+    return _create_system_settings_for_assignment()
+
+
+@pytest.fixture
+def sample_exhibitions(db, system_settings_for_assignment):
+    """Create sample exhibitions for testing."""
+    return _create_sample_exhibitions()
+
+
+@pytest.fixture
+def positions_in_week(system_settings_for_assignment, sample_exhibitions):
+    """
+    Positions of next_week for sample_exhibitions, loaded once per test.
+    
+    Exhibition is joined (select_related), ordered by date and start time.
+    Slice the list instead of re-querying for a subset.
+    """
+    settings = system_settings_for_assignment
+    return list(Position.objects.filter(
+        date__gte=settings.next_week_start,
+        date__lte=settings.next_week_end
+    ).select_related('exhibition').order_by('date', 'start_time'))
+
+
+@pytest.fixture(scope='module')
+def module_transaction(django_db_setup, django_db_blocker):
+    """
+    Outer transaction for module-scoped test data.
+    
+    Data created by module-scoped fixtures that depend on this one is
+    rolled back after the module's last test. Each test still runs in its
+    own savepoint.
+    """
+    with django_db_blocker.unblock():
+        with transaction.atomic():
+            yield
+            transaction.set_rollback(True)
+
+
+@pytest.fixture(scope='module')
+def shared_system_settings(module_transaction, django_db_blocker):
+    """
+    Module-scoped SystemSettings (see system_settings_for_assignment).
+    
+    Override system_settings_for_assignment in the test module to use it.
+    """
+    with django_db_blocker.unblock():
+        return _create_system_settings_for_assignment()
+
+
+@pytest.fixture(scope='module')
+def shared_assignment_data(shared_system_settings, django_db_blocker):
+    """
+    Module-scoped (settings, exhibitions) for modules that only read them.
+    
+    Created once inside module_transaction, rolled back after the module's
+    last test. Override system_settings_for_assignment / sample_exhibitions
+    in the test module to use it.
+    """
+    with django_db_blocker.unblock():
+        exhibitions = _create_sample_exhibitions()
+    return shared_system_settings, exhibitions
+
+
+@pytest.fixture(scope='module')
+def guard_no_prefs(shared_assignment_data, django_db_blocker):
+    """
+    Module-scoped guard without any preferences, for tests that only read it.
+    
+    Created inside module_transaction, so it is rolled back together with
+    the shared settings and exhibitions.
+    """
+    with django_db_blocker.unblock():
+        return _create_guard_with_user(
+            'shared_noprefs', 'np@test.com', availability=3, priority=Decimal('7.5')
+        )
+
+
 @pytest.fixture
 def sample_exhibitions_weekdays_only(db, system_settings_for_assignment):
     """Create sample exhibitions for testing - weekdays only (no weekends)."""
@@ -140,6 +220,61 @@ def special_event_exhibition(db):
     )
 
 
+def _monday_9am():
+    """
+    Monday 09:00 of current week (within configuration period).
+    
+    Configuration period is Monday 08:00 - 1h before automated assignment.
+    """
+    now = timezone.now()
+    days_since_monday = now.weekday()  # Monday=0
+    return now.replace(hour=9, minute=0, second=0, microsecond=0) - timedelta(days=days_since_monday)
+
+
+def _create_guard_with_user(username, email, availability=None, priority=Decimal('1.0'),
+                            set_password=False):
+    """
+    Create guard user and set guard availability and priority.
+    
+    Guard profile is auto-created via post_save signal when User with ROLE_GUARD is created.
+    User gets an unusable password (no hashing) unless set_password=True,
+    then the password is 'testpass123'.
+    """
+    user = User.objects.create(
+        username=username,
+        email=email,
+        password=make_password('testpass123' if set_password else None),
+        role=User.ROLE_GUARD,
+        is_active=True
+    )
+    
+    # Guard is auto-created by signal - Guard(user=user) caches it on user.guard,
+    # so no query is needed to retrieve it (and guard.user is the same user)
+    guard = user.guard
+    
+    # Update availability and priority
+    update_fields = ['priority_number']
+    if availability is not None:
+        guard.availability = availability
+        guard.availability_updated_at = _monday_9am()
+        update_fields += ['availability', 'availability_updated_at']
+    
+    guard.priority_number = priority
+    guard.save(update_fields=update_fields)
+    
+    return guard
+
+
+@pytest.fixture(scope='session')
+def guard_factory():
+    """
+    Same factory as create_guard_with_user, usable from module-scoped fixtures.
+    
+    Does not enable database access - call it inside django_db_blocker.unblock().
+    """
+    return _create_guard_with_user
+
+
 @pytest.fixture
 def create_guard_with_user(db):
     """
@@ -149,35 +284,54 @@ def create_guard_with_user(db):
     
     Usage:
         guard = create_guard_with_user('username', 'email@test.com', availability=3, priority=Decimal('2.0'))
+        guard = create_guard_with_user('username', 'email@test.com', set_password=True)  # can log in
     """
-    def _create_guard(username, email, availability=None, priority=Decimal('1.0')):
-        user = User.objects.create(
-            username=username,
-            email=email,
-            password=make_password('testpass123'),
-            role=User.ROLE_GUARD,
-            is_active=True
-        )
-        
-        # Guard is auto-created by signal - retrieve it
-        guard = Guard.objects.get(user=user)
-        
-        # Update availability and priority
-        if availability is not None:
-            guard.availability = availability
-            # Set availability_updated_at to Monday 09:00 (within configuration period)
-            # Configuration period is Monday 08:00 - 1h before automated assignment
-            now = timezone.now()
-            days_since_monday = now.weekday()  # Monday=0
-            monday_9am = now.replace(hour=9, minute=0, second=0, microsecond=0) - timedelta(days=days_since_monday)
-            guard.availability_updated_at = monday_9am
+    return _create_guard_with_user
+
+
+@pytest.fixture
+def create_guards_bulk(db):
+    """
+    Fixture factory for creating many guards at once.
+    
+    Users and guards are inserted with bulk_create (2 queries total) and get an
+    unusable password, so no password hashing happens. bulk_create does not fire
+    post_save, so Guard profiles are created here instead of by the signal.
+    
+    availability and priority can be a single value (same for all guards)
+    or a list with one value per guard.
+    
+    Usage:
+        guards = create_guards_bulk('guard', 10, availability=5, priority=Decimal('2.0'))
+        guards = create_guards_bulk('guard', 3, availability=[1, 2, 3])
+    """
+    def _create_guards(prefix, count, availability=None, priority=Decimal('1.0')):
+        availabilities = availability if isinstance(availability, (list, tuple)) else [availability] * count
+        priorities = priority if isinstance(priority, (list, tuple)) else [priority] * count
+        updated_at = _monday_9am()
         
-        guard.priority_number = priority
-        guard.save()
+        users = User.objects.bulk_create([
+            User(
+                username=f'{prefix}{i}',
+                email=f'{prefix}{i}@test.com',
+                password=make_password(None),
+                role=User.ROLE_GUARD,
+                is_active=True
+            )
+            for i in range(count)
+        ])
         
-        return guard
+        return Guard.objects.bulk_create([
+            Guard(
+                user=user,
+                availability=availabilities[i],
+                availability_updated_at=updated_at if availabilities[i] is not None else None,
+                priority_number=priorities[i]
+            )
+            for i, user in enumerate(users)
+        ])
     
-    return _create_guard
+    return _create_guards
 
 
 @pytest.fixture
@@ -257,27 +411,26 @@ def next_week_positions(db, system_settings_for_assignment, sample_exhibitions):
         for exhibition in sample_exhibitions:
             if work_date.weekday() in exhibition.open_on:
                 for _ in range(exhibition.number_of_positions):
-                    pos = Position.objects.create(
+                    positions.append(Position(
                         exhibition=exhibition,
                         date=work_date,
                         start_time=settings.weekday_morning_start,
                         end_time=settings.weekday_morning_end
-                    )
-                    positions.append(pos)
+                    ))
         
         # Afternoon shift positions
         for exhibition in sample_exhibitions:
             if work_date.weekday() in exhibition.open_on:
                 for _ in range(exhibition.number_of_positions):
-                    pos = Position.objects.create(
+                    positions.append(Position(
                         exhibition=exhibition,
                         date=work_date,
                         start_time=settings.weekday_afternoon_start,
                         end_time=settings.weekday_afternoon_end
-                    )
-                    positions.append(pos)
+                    ))
     
-    return positions
+    # Single multi-row INSERT for the whole week
+    return Position.objects.bulk_create(positions)
 
 
 @pytest.fixture
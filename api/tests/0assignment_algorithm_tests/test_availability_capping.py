@@ -112,7 +112,7 @@ def test_priority_weighted_capping(
 
 @pytest.mark.django_db
 def test_capping_respects_minimum(
-    create_guard_with_user, system_settings_for_assignment
+    create_guards_bulk, system_settings_for_assignment
 ):
     """
     Cap can go to 0 if there aren't enough positions for everyone.
@@ -120,10 +120,7 @@ def test_capping_respects_minimum(
     settings = system_settings_for_assignment
     
     # Create many guards with low supply
-    guards = []
-    for i in range(10):
-        guard = create_guard_with_user(f'guard{i}', f'g{i}@test.com', availability=5, priority=Decimal('2.0'))
-        guards.append(guard)
+    guards = create_guards_bulk('guard', 10, availability=5, priority=Decimal('2.0'))
     
     total_positions = 20  # Demand is 50, need to cap heavily
     
@@ -213,7 +210,7 @@ def test_capping_reduces_guard_slots_in_matrix(
 
 @pytest.mark.django_db
 def test_all_guards_capped_equally_when_same_priority(
-    create_guard_with_user, system_settings_for_assignment
+    create_guards_bulk, system_settings_for_assignment
 ):
     """
     Guards with identical priority and availability get capped equally.
@@ -221,10 +218,7 @@ def test_all_guards_capped_equally_when_same_priority(
     settings = system_settings_for_assignment
     
     # Create guards with identical stats
-    guards = []
-    for i in range(5):
-        guard = create_guard_with_user(f'guard{i}', f'g{i}@test.com', availability=5, priority=Decimal('2.0'))
-        guards.append(guard)
+    guards = create_guards_bulk('guard', 5, availability=5, priority=Decimal('2.0'))
     
     total_positions = 20  # Demand is 25, need to reduce by 5 (1 each)
     
@@ -401,7 +395,7 @@ def test_partial_capping_scenario(
 
 @pytest.mark.django_db
 def test_extreme_shortage_scenario(
-    create_guard_with_user, system_settings_for_assignment
+    create_guards_bulk, system_settings_for_assignment
 ):
     """
     When positions are scarce, many guards get heavily capped or even 0.
@@ -409,15 +403,12 @@ def test_extreme_shortage_scenario(
     settings = system_settings_for_assignment
     
     # Create many guards with low supply
-    guards = []
-    for i in range(20):
-        guard = create_guard_with_user(
-            f'guard{i}', 
-            f'g{i}@test.com', 
-            availability=5, 
-            priority=Decimal(str(i))  # Varying priorities
-        )
-        guards.append(guard)
+    guards = create_guards_bulk(
+        'guard',
+        20,
+        availability=5,
+        priority=[Decimal(str(i)) for i in range(20)]  # Varying priorities
+    )
     
     total_positions = 30  # Demand is 100, extreme shortage
     
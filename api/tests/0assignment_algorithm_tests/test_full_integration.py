@@ -42,7 +42,7 @@ class TestCompleteWorkflow:
             date__gte=settings.next_week_start,
             date__lte=settings.next_week_end
         )
-        assert positions.count() > 0
+        assert positions.exists()
         
         # Create 25 guards with realistic availability (1-4)
         guards = []
@@ -19,13 +19,19 @@ import pytest
 from decimal import Decimal
 from datetime import timedelta
 import numpy as np
+from scipy.optimize import linear_sum_assignment
 
 from api.models import Position, PositionHistory, GuardWorkPeriod
-from background_tasks.assignment_algorithm import assign_positions_automatically
+from background_tasks.assignment_algorithm import (
+    assign_positions_automatically,
+    solve_assignment,
+    solve_lap,
+    solve_transportation,
+)
 
 
 # ============================================================================
-# HUNGARIAN ALGORITHM EXECUTION TESTS (3 tests)
+# HUNGARIAN ALGORITHM EXECUTION TESTS (7 tests)
 # ============================================================================
 
 @pytest.mark.django_db
@@ -105,8 +111,8 @@ def test_optimal_assignment_respects_scores(
     )
     
     # Both should have assignments (if enough positions exist)
-    assert assignments_high.count() > 0
-    assert assignments_low.count() > 0
+    assert assignments_high.exists()
+    assert assignments_low.exists()
     
     # High priority guard should not get significantly fewer positions than low priority
     # (The algorithm optimizes for overall matching, not individual preference)
@@ -168,6 +174,126 @@ def test_hungarian_handles_more_guards_than_positions(
     assert guards_with_assignments > 0
 
 
+def test_component_solver_matches_full_hungarian():
+    """
+    Test that solving per connected component gives the same optimum
+    as one Hungarian run over the whole matrix.
+    Two independent blocks + a row and a column with no valid pair,
+    then a dense matrix (single component).
+    """
+    rng = np.random.default_rng(42)
+    score_matrix = np.full((7, 6), -9999.0)
+    score_matrix[0:3, 0:2] = rng.random((3, 2))
+    score_matrix[3:6, 2:5] = rng.random((3, 3))
+    score_matrix[4, 3] = -9999  # Invalid pair inside a block
+    
+    rows, cols = solve_assignment(score_matrix)
+    full_rows, full_cols = linear_sum_assignment(score_matrix, maximize=True)
+    
+    def valid_total(r, c):
+        scores = score_matrix[r, c]
+        return scores[scores != -9999].sum()
+    
+    assert list(rows) == sorted(rows)
+    assert len(set(cols)) == len(cols)
+    assert 6 not in rows and 5 not in cols  # Nothing valid to assign
+    assert valid_total(rows, cols) == pytest.approx(valid_total(full_rows, full_cols))
+    
+    # Single component spanning the whole matrix is solved directly
+    dense = rng.random((4, 5))
+    dense_rows, dense_cols = solve_assignment(dense)
+    expected_rows, expected_cols = linear_sum_assignment(dense, maximize=True)
+    assert np.array_equal(dense_rows, expected_rows)
+    assert np.array_equal(dense_cols, expected_cols)
+
+
+def test_sparse_solver_matches_dense_hungarian():
+    """
+    Test that sparse matrices (solved by full bipartite matching) get the same
+    optimum as dense Hungarian, and that matrices without a full matching over
+    valid pairs fall back to the dense solver.
+    """
+    rng = np.random.default_rng(7)
+    n = 40
+    score_matrix = np.full((n, n), -9999.0)
+    score_matrix[np.arange(n), np.arange(n)] = rng.random(n)
+    score_matrix[np.arange(n - 1), np.arange(1, n)] = rng.random(n - 1)  # ~5% valid
+    
+    rows, cols = solve_lap(score_matrix)
+    dense_rows, dense_cols = linear_sum_assignment(score_matrix, maximize=True)
+    
+    assert list(rows) == sorted(rows)
+    assert score_matrix[rows, cols].sum() == pytest.approx(score_matrix[dense_rows, dense_cols].sum())
+    
+    # Row 0 and row 1 can only take position 0 - no full matching exists
+    score_matrix[1, :] = -9999
+    score_matrix[1, 0] = 0.5
+    score_matrix[0, 1] = -9999
+    rows, cols = solve_lap(score_matrix)
+    dense_rows, dense_cols = linear_sum_assignment(score_matrix, maximize=True)
+    assert np.array_equal(rows, dense_rows)
+    assert np.array_equal(cols, dense_cols)
+
+
+def test_transportation_solver_matches_hungarian():
+    """
+    Test that transportation LP (guard capacities instead of duplicated rows)
+    reaches the same optimum as Hungarian on the duplicated matrix.
+    """
+    rng = np.random.default_rng(3)
+    guard_scores = rng.random((4, 9))
+    guard_scores[guard_scores < 0.3] = -9999  # Invalid pairs
+    capacities = [3, 1, 2, 4]
+    score_matrix = np.repeat(guard_scores, capacities, axis=0)
+    
+    guard_rows = {}
+    start = 0
+    for guard_id, capacity in enumerate(capacities):
+        guard_rows[guard_id] = list(range(start, start + capacity))
+        start += capacity
+    
+    rows, cols = solve_transportation(score_matrix, guard_rows)
+    hungarian_rows, hungarian_cols = solve_assignment(score_matrix)
+    
+    assert list(rows) == sorted(rows)
+    assert len(set(rows)) == len(rows)
+    assert len(set(cols)) == len(cols)
+    assert (score_matrix[rows, cols] != -9999).all()
+    hungarian_scores = score_matrix[hungarian_rows, hungarian_cols]
+    assert score_matrix[rows, cols].sum() == pytest.approx(
+        hungarian_scores[hungarian_scores != -9999].sum()
+    )
+
+
+@pytest.mark.django_db
+def test_transportation_solver_respects_availability(
+    settings, create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+):
+    """
+    Test that full assignment with ASSIGNMENT_SOLVER='transportation'
+    assigns positions without exceeding guard availability.
+    """
+    settings.ASSIGNMENT_SOLVER = 'transportation'
+    
+    guard1 = create_guard_with_user('lp_guard1', 'lp1@test.com', availability=3, priority=Decimal('2.0'))
+    guard2 = create_guard_with_user('lp_guard2', 'lp2@test.com', availability=2, priority=Decimal('1.5'))
+    GuardWorkPeriod.objects.bulk_create([
+        GuardWorkPeriod(guard=guard, day_of_week=day, shift_type=shift, is_template=True)
+        for guard in [guard1, guard2]
+        for day in range(5)
+        for shift in ['morning', 'afternoon']
+    ])
+    
+    result = assign_positions_automatically(system_settings_for_assignment)
+    
+    assert result['assignments_created'] > 0
+    for guard in [guard1, guard2]:
+        assigned = PositionHistory.objects.filter(
+            guard=guard, action=PositionHistory.Action.ASSIGNED
+        ).count()
+        assert assigned <= guard.availability
+
+
 # ============================================================================
 # ASSIGNMENT POST-PROCESSING TESTS (4 tests)
 # ============================================================================
@@ -368,7 +494,7 @@ def test_no_positions_returns_gracefully(
         action=PositionHistory.Action.ASSIGNED,
         guard=guard
     )
-    assert assignments.count() == 0
+    assert not assignments.exists()
 
 
 @pytest.mark.django_db
@@ -417,4 +543,4 @@ def test_all_guards_unavailable_for_all_positions(
     )
     
     # If workdays don't include Sunday, assignments should be 0
-    assert assignments.count() == 0
+    assert not assignments.exists()
@@ -88,7 +88,7 @@ def test_minimum_calculated_after_full_assignment(
 
 @pytest.mark.django_db
 def test_minimum_with_many_empty_positions_and_few_guards(
-    create_guard_with_user, system_settings_for_assignment
+    create_guard_with_user, create_guards_bulk, system_settings_for_assignment
 ):
     """
     When many positions remain empty (not enough guards participated in assignment),
@@ -131,8 +131,7 @@ def test_minimum_with_many_empty_positions_and_few_guards(
             GuardWorkPeriod.objects.create(guard=guard, day_of_week=day, shift_type='afternoon', is_template=True)
     
     # Create 3 additional guards WITHOUT availability (won't participate but are counted!)
-    for i in range(3):
-        create_guard_with_user(f'outer{i}', f'outer{i}@test.com', availability=None, priority=Decimal('1.0'))
+    create_guards_bulk('outer', 3, availability=None, priority=Decimal('1.0'))
     
     # Run assignment (only guard1 and guard2 will get positions, ~5 will remain empty)
     result = assign_positions_automatically(settings)
@@ -287,7 +286,7 @@ def test_minimum_updates_system_settings(
 
 @pytest.mark.django_db
 def test_minimum_calculation_with_no_assignments(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guards_bulk, system_settings_for_assignment, sample_exhibitions
 ):
     """
     When no automated assignments are made (guards without availability),
@@ -302,8 +301,7 @@ def test_minimum_calculation_with_no_assignments(
     position_count = len(positions)
     
     # Create guards WITHOUT availability (won't participate in automated assignment)
-    for i in range(5):
-        create_guard_with_user(f'guard{i}', f'g{i}@test.com', availability=None, priority=Decimal('1.0'))
+    create_guards_bulk('guard', 5, availability=None, priority=Decimal('1.0'))
     
     # Run assignment (will not assign anything - no one has availability)
     assign_positions_automatically(settings)
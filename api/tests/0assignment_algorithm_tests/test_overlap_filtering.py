@@ -5,8 +5,10 @@ Ensures guards cannot be assigned to overlapping positions
 (same time slot on different exhibitions).
 """
 import pytest
+from dataclasses import dataclass
 from datetime import date, time, timedelta
 from decimal import Decimal
+from django.db.models import Count, Min
 
 from api.api_models import (
     User, Guard, Exhibition, Position, PositionHistory, SystemSettings,
@@ -19,17 +21,19 @@ from background_tasks.assignment_algorithm import (
 )
 
 
+@dataclass(slots=True)
+class MockPosition:
+    """Minimal stand-in for Position (only fields used by overlap checks)."""
+    date: date
+    start_time: time
+    end_time: time
+
+
 class TestPositionsOverlap:
-    """Unit tests for positions_overlap function."""
+    """Unit tests for positions_overlap function (no database access, no django_db mark)."""
     
     def test_same_day_same_time_overlaps(self):
         """Positions at same date and time overlap."""
-        class MockPosition:
-            def __init__(self, d, start, end):
-                self.date = d
-                self.start_time = start
-                self.end_time = end
-        
         day = date(2024, 3, 10)  # Sunday
         pos1 = MockPosition(day, time(9, 0), time(13, 0))
         pos2 = MockPosition(day, time(9, 0), time(13, 0))
@@ -38,12 +42,6 @@ class TestPositionsOverlap:
     
     def test_same_day_partial_overlap(self):
         """Positions that partially overlap should be detected."""
-        class MockPosition:
-            def __init__(self, d, start, end):
-                self.date = d
-                self.start_time = start
-                self.end_time = end
-        
         day = date(2024, 3, 10)
         pos1 = MockPosition(day, time(9, 0), time(13, 0))
         pos2 = MockPosition(day, time(12, 0), time(16, 0))  # Starts before pos1 ends
@@ -52,12 +50,6 @@ class TestPositionsOverlap:
     
     def test_same_day_no_overlap(self):
         """Morning and afternoon positions don't overlap."""
-        class MockPosition:
-            def __init__(self, d, start, end):
-                self.date = d
-                self.start_time = start
-                self.end_time = end
-        
         day = date(2024, 3, 10)
         pos1 = MockPosition(day, time(9, 0), time(13, 0))  # Morning
         pos2 = MockPosition(day, time(14, 0), time(18, 0))  # Afternoon
@@ -66,12 +58,6 @@ class TestPositionsOverlap:
     
     def test_different_days_no_overlap(self):
         """Same time but different days don't overlap."""
-        class MockPosition:
-            def __init__(self, d, start, end):
-                self.date = d
-                self.start_time = start
-                self.end_time = end
-        
         pos1 = MockPosition(date(2024, 3, 10), time(9, 0), time(13, 0))
         pos2 = MockPosition(date(2024, 3, 11), time(9, 0), time(13, 0))
         
@@ -79,12 +65,6 @@ class TestPositionsOverlap:
     
     def test_adjacent_positions_no_overlap(self):
         """Positions that touch at boundary don't overlap."""
-        class MockPosition:
-            def __init__(self, d, start, end):
-                self.date = d
-                self.start_time = start
-                self.end_time = end
-        
         day = date(2024, 3, 10)
         pos1 = MockPosition(day, time(9, 0), time(13, 0))
         pos2 = MockPosition(day, time(13, 0), time(17, 0))  # Starts exactly when pos1 ends
@@ -93,16 +73,10 @@ class TestPositionsOverlap:
 
 
 class TestBuildOverlapGroups:
-    """Unit tests for build_overlap_groups function."""
+    """Unit tests for build_overlap_groups function (no database access, no django_db mark)."""
     
     def test_no_overlaps_returns_empty(self):
         """Non-overlapping positions return empty overlap map."""
-        class MockPosition:
-            def __init__(self, d, start, end):
-                self.date = d
-                self.start_time = start
-                self.end_time = end
-        
         day = date(2024, 3, 10)
         positions = [
             MockPosition(day, time(9, 0), time(13, 0)),   # Morning
@@ -116,12 +90,6 @@ class TestBuildOverlapGroups:
     
     def test_two_overlapping_positions(self):
         """Two overlapping positions are mapped to each other."""
-        class MockPosition:
-            def __init__(self, d, start, end):
-                self.date = d
-                self.start_time = start
-                self.end_time = end
-        
         day = date(2024, 3, 10)
         positions = [
             MockPosition(day, time(9, 0), time(13, 0)),
@@ -137,12 +105,6 @@ class TestBuildOverlapGroups:
     
     def test_three_overlapping_positions(self):
         """Three positions at same time all overlap with each other."""
-        class MockPosition:
-            def __init__(self, d, start, end):
-                self.date = d
-                self.start_time = start
-                self.end_time = end
-        
         day = date(2024, 3, 10)
         positions = [
             MockPosition(day, time(9, 0), time(13, 0)),
@@ -159,12 +121,6 @@ class TestBuildOverlapGroups:
     
     def test_mixed_overlapping_and_non_overlapping(self):
         """Mix of overlapping and non-overlapping positions."""
-        class MockPosition:
-            def __init__(self, d, start, end):
-                self.date = d
-                self.start_time = start
-                self.end_time = end
-        
         day = date(2024, 3, 10)
         positions = [
             MockPosition(day, time(9, 0), time(13, 0)),   # 0: Morning - overlaps with 1
@@ -183,14 +139,19 @@ class TestBuildOverlapGroups:
 class TestOverlapFilteringIntegration:
     """Integration tests for overlap filtering in full assignment process."""
     
-    @pytest.fixture
-    def settings_with_sunday(self, db):
-        """Create settings configured for a week including Sunday."""
+    @pytest.fixture(scope='module')
+    def week_dates(self):
+        """(next_monday, next_sunday) - computed once per module."""
         today = date.today()
         # Find next Sunday
         days_until_sunday = (6 - today.weekday()) % 7 or 7
         next_sunday = today + timedelta(days=days_until_sunday)
-        next_monday = next_sunday - timedelta(days=6)
+        return next_sunday - timedelta(days=6), next_sunday
+    
+    @pytest.fixture
+    def settings_with_sunday(self, db, week_dates):
+        """Create settings configured for a week including Sunday."""
+        next_monday, next_sunday = week_dates
         
         return SystemSettings.objects.create(
             this_week_start=next_monday - timedelta(days=7),
@@ -366,20 +327,21 @@ class TestOverlapFilteringIntegration:
             "Both overlapping positions should be filled by different guards"
         )
         
-        # Verify each guard got exactly one position
-        guard1_assignments = PositionHistory.objects.filter(
-            guard=guard_with_high_availability,
-            action=PositionHistory.Action.ASSIGNED
-        )
-        guard2_assignments = PositionHistory.objects.filter(
-            guard=second_guard,
-            action=PositionHistory.Action.ASSIGNED
-        )
+        # Verify each guard got exactly one position (single aggregation query)
+        assignments = {
+            row['guard_id']: row
+            for row in PositionHistory.objects.filter(
+                guard_id__in=[guard_with_high_availability.id, second_guard.id],
+                action=PositionHistory.Action.ASSIGNED
+            ).values('guard_id').annotate(n=Count('id'), position_id=Min('position_id'))
+        }
+        guard1_row = assignments[guard_with_high_availability.id]
+        guard2_row = assignments[second_guard.id]
         
-        assert guard1_assignments.count() == 1
-        assert guard2_assignments.count() == 1
+        assert guard1_row['n'] == 1
+        assert guard2_row['n'] == 1
         
         # Make sure they're on different positions
-        pos1 = guard1_assignments.first().position
-        pos2 = guard2_assignments.first().position
-        assert pos1 != pos2, "Guards should be assigned to different positions"
+        assert guard1_row['position_id'] != guard2_row['position_id'], (
+            "Guards should be assigned to different positions"
+        )
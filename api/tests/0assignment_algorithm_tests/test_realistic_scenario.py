@@ -84,12 +84,16 @@ NAPOMENA O PRIORITETU:
 
 ================================================================================
 """
+import sys
 import pytest
 import logging
-from decimal import Decimal
+import numpy as np
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import islice, product
 from datetime import timedelta
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Count, Prefetch, Q, prefetch_related_objects
 
 from api.models import (
     Position, PositionHistory, Guard, Exhibition,
@@ -99,22 +103,63 @@ from background_tasks.assignment_algorithm import assign_positions_automatically
 from background_tasks.tasks import calculate_availability_caps
 
 
-def get_guard_available_days(guard, settings):
+def prefetch_guard_data(guards, settings):
     """
-    Dohvati dostupne dane za čuvara na temelju njegovih work periods.
+    Dohvati podatke svih čuvara jednim upitom po relaciji.
     
-    Koristi istu logiku kao API endpoint /api/guards/{id}/available_days/
+    Prefetcha user, work periods (template ili za next_week) te template
+    preferencije izložbi i dana - guard.work_periods.all() itd. nakon toga
+    ne rade upit po čuvaru.
+    """
+    prefetch_related_objects(
+        guards,
+        'user',
+        Prefetch(
+            'work_periods',
+            queryset=GuardWorkPeriod.objects.filter(
+                Q(is_template=True) | Q(next_week_start=settings.next_week_start)
+            )
+        ),
+        Prefetch(
+            'exhibition_preferences',
+            queryset=GuardExhibitionPreference.objects.filter(is_template=True)
+        ),
+        Prefetch(
+            'day_preferences',
+            queryset=GuardDayPreference.objects.filter(is_template=True)
+        ),
+    )
+
+
+def _first_prefetched(related_manager):
+    """Prvi objekt prefetchane relacije ili None (bez upita)."""
+    objects = related_manager.all()
+    return objects[0] if objects else None
+
+
+def _guard_work_days(guard, settings):
     """
-    guard_work_periods = GuardWorkPeriod.objects.filter(
+    Radni dani čuvara (set day_of_week).
+    
+    Iz prefetchanih work periods (prefetch_guard_data) ako postoje, inače iz
+    baze - dohvaća se samo day_of_week (DISTINCT u bazi), bez GuardWorkPeriod objekata.
+    """
+    if 'work_periods' in getattr(guard, '_prefetched_objects_cache', {}):
+        return {wp.day_of_week for wp in guard.work_periods.all()}
+    return set(GuardWorkPeriod.objects.filter(
         guard=guard
     ).filter(
         Q(is_template=True) | Q(next_week_start=settings.next_week_start)
-    )
-    
-    if not guard_work_periods.exists():
-        return []
+    ).values_list('day_of_week', flat=True).distinct().order_by('day_of_week'))
+
+
+def get_guard_available_days(guard, settings):
+    """
+    Dohvati dostupne dane za čuvara na temelju njegovih work periods.
     
-    return sorted(set(wp.day_of_week for wp in guard_work_periods))
+    Koristi istu logiku kao API endpoint /api/guards/{id}/available_days/
+    """
+    return sorted(_guard_work_days(guard, settings))
 
 
 def get_guard_available_exhibitions(guard, settings, exhibitions_dict):
@@ -123,26 +168,83 @@ def get_guard_available_exhibitions(guard, settings, exhibitions_dict):
     
     Koristi istu logiku kao API endpoint /api/guards/{id}/available_exhibitions/
     """
-    guard_work_periods = GuardWorkPeriod.objects.filter(
-        guard=guard
-    ).filter(
-        Q(is_template=True) | Q(next_week_start=settings.next_week_start)
-    )
+    guard_work_days = _guard_work_days(guard, settings)
     
-    if not guard_work_periods.exists():
+    if not guard_work_days:
         return []
     
-    guard_work_days = set(wp.day_of_week for wp in guard_work_periods)
-    
     # Vraća izložbe koje su otvorene na bar jedan od čuvarovih radnih dana
     available = [
         ex for ex in exhibitions_dict.values()
-        if any(day in ex.open_on for day in guard_work_days)
+        if not guard_work_days.isdisjoint(ex.open_on)
     ]
     
     return available
 
 
+_DAY_NAMES = ("Pon", "Uto", "Sri", "Cet", "Pet", "Sub", "Ned")
+
+# Predlosci redaka tablica (format spec se parsira jednom, ne za svaki redak)
+_GUARD_ROW_FMT = "{:<8} {:<10.2f} {:<8} {:<6} {:<8} {:<20} {:<15}".format
+_NORM_ROW_FMT = "{:<8} {:<12.2f} {:<12.3f} {:<15.3f}".format
+_PRIMJER_ROW_FMT = "{:<6} | {:<8.2f} | {:<7.3f} | {:<8.2f} | {:<9.3f} | {:<8.2f} | {:<9.3f} | {:<12.3f}".format
+
+
+def _write_rows(rows):
+    """Ispisi retke tablice jednim pozivom sys.stdout.write (umjesto print po retku)."""
+    sys.stdout.write("\n".join(rows) + "\n")
+
+
+@contextmanager
+def _mute_logging():
+    """
+    Privremeno iskljuci sve logove (npr. da se ne mijesaju s ispisom testa).
+    
+    Prethodna razina logging.disable se vraca i kad test padne.
+    """
+    previous = logging.root.manager.disable
+    logging.disable(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        logging.disable(previous)
+
+
+@pytest.fixture
+def muted_logging():
+    """Logovi su iskljuceni do kraja testa (vidi _mute_logging)."""
+    with _mute_logging():
+        yield
+
+
+@dataclass(slots=True)
+class GuardRow:
+    """
+    Podaci jednog cuvara za sve tablice ispisa.
+    
+    Racunaju se u jednom prolazu kroz cuvare; tablice samo ispisuju retke.
+    exh_names / day_names su None ako cuvar nema preferenciju.
+    """
+    letter: str
+    priority: float
+    availability: int
+    wp_count: int
+    ratio: str
+    exh_names: list
+    day_names: list
+    p_norm: float
+    exh_raw: float
+    day_raw: float
+    total_score: float
+
+
+# Postavke se samo citaju - kreiraju se jednom po modulu, kao i izlozbe i cuvari
+
+@pytest.fixture
+def system_settings_for_assignment(shared_system_settings):
+    return shared_system_settings
+
+
 class TestRealisticScenario:
     """
     Realistican test scenarij za demonstraciju algoritma dodjele pozicija.
@@ -151,18 +253,23 @@ class TestRealisticScenario:
     pokrece algoritam dodjele i prikazuje detaljne rezultate.
     """
     
-    @pytest.fixture
-    def realistic_exhibitions(self, system_settings_for_assignment):
+    @pytest.fixture(scope='module')
+    def realistic_exhibitions(self, shared_system_settings, django_db_blocker):
         """
         Kreira 5 izlozbi s razlicitim brojevima pozicija.
         
         Izlozbe su otvorene od utorka do nedjelje (radni dani muzeja),
         sto odgovara postavkama u system_settings_for_assignment.
+        Kreiraju se jednom po modulu (module_transaction, rollback na kraju).
         
         Returns:
             dict: Rjecnik s izlozbama {naziv: Exhibition objekt}
         """
-        settings = system_settings_for_assignment
+        with django_db_blocker.unblock():
+            return self._create_realistic_exhibitions()
+    
+    @staticmethod
+    def _create_realistic_exhibitions():
         today = timezone.now()  # datetime, not date
         
         # Definicija izlozbi: (naziv, broj_pozicija, opis)
@@ -190,8 +297,8 @@ class TestRealisticScenario:
             
         return exhibitions
     
-    @pytest.fixture
-    def alphabet_guards(self, db, realistic_exhibitions, create_guard_with_user):
+    @pytest.fixture(scope='module')
+    def alphabet_guards(self, realistic_exhibitions, guard_factory, django_db_blocker):
         """
         Kreira 26 cuvara (A-Z) s razlicitim karakteristikama.
         
@@ -206,11 +313,21 @@ class TestRealisticScenario:
         
         Omjer availability:work_periods varira od 1:1 do 1:2
         
+        Kreiraju se jednom po modulu (module_transaction, rollback na kraju).
+        
         Returns:
             list: Lista Guard objekata sortirana po abecedi
         """
+        with django_db_blocker.unblock():
+            return self._create_alphabet_guards(realistic_exhibitions, guard_factory)
+    
+    @staticmethod
+    def _create_alphabet_guards(realistic_exhibitions, create_guard_with_user):
         guards = []
+        work_periods = []
         exhibitions = realistic_exhibitions
+        ex_items = list(exhibitions.items())
+        open_on_sets = {name: frozenset(exh.open_on) for name, exh in ex_items}
         
         # ========================================================================
         # KONFIGURACIJA CUVARA
@@ -221,45 +338,47 @@ class TestRealisticScenario:
         
         guard_configs = [
             # GRUPA 1: Najbolji prioritet (A)
-            ("A", Decimal("5.00"), 10, 10, {}),
+            ("A", 5.00, 10, 10, {}),
             
             # GRUPA 2: Drugi najbolji (B, C, D, E) - svi imaju priority 4.00
-            ("B", Decimal("4.00"), 8, 10, {"exhibitions": ["ZKG"]}),
-            ("C", Decimal("4.00"), 8, 12, {"days": [1]}),  # Preferira utorak (day 1)
-            ("D", Decimal("4.00"), 6, 10, {}),  # Bez preferencija
-            ("E", Decimal("4.00"), 5, 10, {"exhibitions": ["Kiparstvo"]}),
+            ("B", 4.00, 8, 10, {"exhibitions": ["ZKG"]}),
+            ("C", 4.00, 8, 12, {"days": [1]}),  # Preferira utorak (day 1)
+            ("D", 4.00, 6, 10, {}),  # Bez preferencija
+            ("E", 4.00, 5, 10, {"exhibitions": ["Kiparstvo"]}),
             
             # GRUPA 3: Srednji prioritet (F-M)
-            ("F", Decimal("3.50"), 5, 8, {"exhibitions": ["Buducnosti"]}),
-            ("G", Decimal("3.25"), 5, 10, {"days": [2, 3]}),  # Sri, cet
-            ("H", Decimal("3.00"), 4, 8, {}),
-            ("I", Decimal("3.00"), 4, 6, {"exhibitions": ["Okidaci", "Blackbox"]}),
-            ("J", Decimal("2.75"), 4, 8, {"days": [4, 5]}),  # Pet, sub
-            ("K", Decimal("2.75"), 3, 6, {}),
-            ("L", Decimal("2.50"), 3, 6, {"exhibitions": ["Kiparstvo"]}),
-            ("M", Decimal("2.50"), 3, 5, {}),
+            ("F", 3.50, 5, 8, {"exhibitions": ["Buducnosti"]}),
+            ("G", 3.25, 5, 10, {"days": [2, 3]}),  # Sri, cet
+            ("H", 3.00, 4, 8, {}),
+            ("I", 3.00, 4, 6, {"exhibitions": ["Okidaci", "Blackbox"]}),
+            ("J", 2.75, 4, 8, {"days": [4, 5]}),  # Pet, sub
+            ("K", 2.75, 3, 6, {}),
+            ("L", 2.50, 3, 6, {"exhibitions": ["Kiparstvo"]}),
+            ("M", 2.50, 3, 5, {}),
             
             # GRUPA 4: Nizi prioritet (N-T)
-            ("N", Decimal("2.25"), 3, 6, {"days": [6]}),  # Preferira nedjelju
-            ("O", Decimal("2.25"), 3, 5, {}),
-            ("P", Decimal("2.00"), 3, 6, {"exhibitions": ["ZKG", "Buducnosti"]}),
-            ("Q", Decimal("2.00"), 3, 5, {}),
-            ("R", Decimal("1.75"), 3, 6, {}),
-            ("S", Decimal("1.75"), 3, 5, {"days": [1, 2, 3]}),
-            ("T", Decimal("1.50"), 3, 6, {}),
+            ("N", 2.25, 3, 6, {"days": [6]}),  # Preferira nedjelju
+            ("O", 2.25, 3, 5, {}),
+            ("P", 2.00, 3, 6, {"exhibitions": ["ZKG", "Buducnosti"]}),
+            ("Q", 2.00, 3, 5, {}),
+            ("R", 1.75, 3, 6, {}),
+            ("S", 1.75, 3, 5, {"days": [1, 2, 3]}),
+            ("T", 1.50, 3, 6, {}),
             
             # GRUPA 5: Nula i negativni prioriteti (U-Z)
             # Ovi cuvari su NAJLOSIJI za dodjelu - imaju najnizi score
-            ("U", Decimal("0.50"), 3, 5, {"exhibitions": ["Blackbox"]}),
-            ("V", Decimal("0.00"), 3, 6, {}),  # Nula prioritet
-            ("W", Decimal("-0.50"), 3, 5, {}),  # Negativan!
-            ("X", Decimal("-1.00"), 3, 6, {"days": [4, 5, 6]}),  # Negativan!
-            ("Y", Decimal("-1.50"), 3, 5, {}),  # Negativan!
-            ("Z", Decimal("-2.00"), 3, 4, {"exhibitions": ["Kiparstvo"], "days": [5, 6]}),  # Najnizi!
+            ("U", 0.50, 3, 5, {"exhibitions": ["Blackbox"]}),
+            ("V", 0.00, 3, 6, {}),  # Nula prioritet
+            ("W", -0.50, 3, 5, {}),  # Negativan!
+            ("X", -1.00, 3, 6, {"days": [4, 5, 6]}),  # Negativan!
+            ("Y", -1.50, 3, 5, {}),  # Negativan!
+            ("Z", -2.00, 3, 4, {"exhibitions": ["Kiparstvo"], "days": [5, 6]}),  # Najnizi!
         ]
         
         for letter, priority, availability, wp_count, prefs in guard_configs:
             # Koristi fixture za kreiranje cuvara
+            # priority je float - DecimalField ga pretvara tek pri spremanju u bazu,
+            # pa guard.priority_number u testu ostaje float (bez Decimal -> float)
             guard = create_guard_with_user(
                 f"guard_{letter}",
                 f"guard_{letter.lower()}@muzej.hr",
@@ -273,36 +392,28 @@ class TestRealisticScenario:
             days = [1, 2, 3, 4, 5, 6]  # Utorak - Nedjelja
             shifts = ['morning', 'afternoon']
             
-            periods_created = 0
-            for day in days:
-                for shift in shifts:
-                    if periods_created >= wp_count:
-                        break
-                    GuardWorkPeriod.objects.create(
-                        guard=guard,
-                        day_of_week=day,
-                        shift_type=shift,
-                        is_template=True
-                    )
-                    periods_created += 1
-                if periods_created >= wp_count:
-                    break
+            # Prvih wp_count (dan, smjena) parova; spremaju se jednim bulk_create nakon petlje
+            guard_work_periods = [
+                GuardWorkPeriod(guard=guard, day_of_week=day, shift_type=shift, is_template=True)
+                for day, shift in islice(product(days, shifts), wp_count)
+            ]
+            work_periods.extend(guard_work_periods)
             
             # ================================================================
             # IZRAČUN DOSTUPNIH DANA I IZLOŽBI
             # Koristi istu logiku kao API endpointi available_days/available_exhibitions
             # ================================================================
             
-            # Dohvati dane iz work periods za ovog čuvara
-            guard_work_periods = GuardWorkPeriod.objects.filter(guard=guard, is_template=True)
-            guard_work_days = sorted(set(wp.day_of_week for wp in guard_work_periods))
+            # Dani iz work periods za ovog čuvara (iz memorije, bez upita)
+            guard_work_days = sorted({wp.day_of_week for wp in guard_work_periods})
             
             # Dohvati izložbe koje su otvorene na čuvarove radne dane
             # Sve izložbe imaju open_on=[1,2,3,4,5,6] pa će sve biti dostupne
             # ako čuvar ima barem jedan od tih dana u work periods
+            guard_work_days_set = frozenset(guard_work_days)
             available_exhibition_ids = [
-                exhibitions[name].id for name in ["ZKG", "Buducnosti", "Okidaci", "Blackbox", "Kiparstvo"]
-                if any(day in exhibitions[name].open_on for day in guard_work_days)
+                exh.id for name, exh in ex_items
+                if not guard_work_days_set.isdisjoint(open_on_sets[name])
             ]
             
             # ================================================================
@@ -311,13 +422,15 @@ class TestRealisticScenario:
             # ================================================================
             
             if "exhibitions" in prefs and prefs["exhibitions"]:
+                available_id_set = set(available_exhibition_ids)
                 preferred_ids = [
                     exhibitions[name].id 
                     for name in prefs["exhibitions"] 
-                    if name in exhibitions and exhibitions[name].id in available_exhibition_ids
+                    if name in exhibitions and exhibitions[name].id in available_id_set
                 ]
                 # Preferirane na početak, ostale na kraj (u proizvoljnom redoslijedu)
-                other_ids = [eid for eid in available_exhibition_ids if eid not in preferred_ids]
+                preferred_id_set = set(preferred_ids)
+                other_ids = [eid for eid in available_exhibition_ids if eid not in preferred_id_set]
                 full_exhibition_order = preferred_ids + other_ids
                 
                 GuardExhibitionPreference.objects.create(
@@ -332,8 +445,9 @@ class TestRealisticScenario:
             # ================================================================
             
             if "days" in prefs and prefs["days"]:
-                preferred_days = [d for d in prefs["days"] if d in guard_work_days]
-                other_days = [d for d in guard_work_days if d not in preferred_days]
+                preferred_days = [d for d in prefs["days"] if d in guard_work_days_set]
+                preferred_day_set = set(preferred_days)
+                other_days = [d for d in guard_work_days if d not in preferred_day_set]
                 full_day_order = preferred_days + other_days
                 
                 GuardDayPreference.objects.create(
@@ -344,6 +458,8 @@ class TestRealisticScenario:
             
             guards.append(guard)
         
+        GuardWorkPeriod.objects.bulk_create(work_periods)
+        
         return guards
     
     @pytest.mark.django_db
@@ -351,7 +467,9 @@ class TestRealisticScenario:
         self, 
         system_settings_for_assignment, 
         realistic_exhibitions,
-        alphabet_guards
+        alphabet_guards,
+        muted_logging,
+        request
     ):
         """
         ========================================================================
@@ -367,13 +485,177 @@ class TestRealisticScenario:
         NAPOMENA: Detaljni ispis je vidljiv samo kad se test pokrene s -s flagom:
         pytest test_realistic_scenario.py -v -s
         """
-        # Suppress logove da se ne miješaju sa našim printom
-        logging.disable(logging.CRITICAL)
-        
         settings = system_settings_for_assignment
         exhibitions = realistic_exhibitions
         guards = alphabet_guards
         
+        # Ispis je vidljiv samo s -s (bez capture) - inace se izvjestaji
+        # ne racunaju ni ne formatiraju, pokrece se samo dodjela i provjere
+        verbose = request.config.getoption('capture') == 'no'
+        
+        if verbose:
+            letters, total_availability = self._print_input_report(settings, exhibitions, guards)
+        
+        # ====================================================================
+        # FAZA 3: POKRETANJE ALGORITMA
+        # ====================================================================
+        
+        # Dohvati pozicije prije dodjele
+        positions_before = Position.objects.filter(
+            date__gte=settings.next_week_start,
+            date__lte=settings.next_week_end,
+            exhibition__is_special_event=False
+        ).count()
+        
+        # ================================================================
+        # AVAILABILITY CAPPING
+        # ================================================================
+        # Ako je ukupni availability > broj pozicija, moramo "cap-ati"
+        # availability svakog cuvara proporcionalno kako bi svi imali
+        # fer sansu za dodjelu.
+        # ================================================================
+        
+        availability_caps = calculate_availability_caps(guards, positions_before)
+        
+        if verbose:
+            self._print_capping_report(
+                guards, letters, positions_before, total_availability, availability_caps
+            )
+        
+        # Pokreni algoritam S CAPPINGOM
+        result = assign_positions_automatically(settings, availability_caps)
+        
+        # Broj dodjela po cuvaru - jedan GROUP BY upit umjesto upita po cuvaru
+        assigned_by_guard = dict(
+            PositionHistory.objects.filter(
+                guard__in=guards,
+                action=PositionHistory.Action.ASSIGNED
+            ).values('guard_id').annotate(n=Count('id')).values_list('guard_id', 'n')
+        )
+        
+        if verbose:
+            self._print_result_report(
+                settings, exhibitions, guards, letters, total_availability, result,
+                assigned_by_guard
+            )
+        
+        # ====================================================================
+        # VERIFIKACIJA (Assertions)
+        # ====================================================================
+        
+        # Osnovna provjera - algoritam je radio
+        assert result['status'] in ['success', 'warning'], \
+            f"Algoritam nije uspio: {result.get('message', 'nepoznata greska')}"
+        
+        # Provjera da su dodjele napravljene
+        assert result['assignments_created'] > 0, \
+            "Algoritam nije napravio nijednu dodjelu"
+        
+        # Provjera da nijedan cuvar nije prekoracio availability
+        for guard in guards:
+            assigned = assigned_by_guard.get(guard.id, 0)
+            assert assigned <= guard.availability, \
+                f"Cuvar {guard.user.username} ima {assigned} dodjela ali availability je {guard.availability}"
+        
+        print("\n[OK] Sve verifikacije uspjesne!")
+        print("=" * 80)
+    
+    def _print_input_report(self, settings, exhibitions, guards):
+        """
+        FAZA 1, FAZA 2 i PRIMJER: ulazni podaci, formula i score za primjer poziciju.
+        
+        Returns:
+            tuple: (letters, total_availability) za ispis ostalih faza
+        """
+        ex_items = list(exhibitions.items())
+        id_to_name = {exh.id: name for name, exh in ex_items}
+        
+        # User, work periods i preferencije svih cuvara - 4 upita ukupno
+        prefetch_guard_data(guards, settings)
+        exh_pref_by_guard = {}
+        day_pref_by_guard = {}
+        for guard in guards:
+            exh_pref = _first_prefetched(guard.exhibition_preferences)
+            if exh_pref:
+                exh_pref_by_guard[guard.id] = exh_pref
+            day_pref = _first_prefetched(guard.day_preferences)
+            if day_pref:
+                day_pref_by_guard[guard.id] = day_pref
+        
+        # Slovo cuvara (guard_A -> A) racuna se jednom, ne u svakoj tablici
+        letters = [guard.user.username.split("_", 1)[1] for guard in guards]
+        
+        # ====================================================================
+        # IZRACUN PODATAKA ZA SVE TABLICE (jedan prolaz kroz cuvare)
+        # ====================================================================
+        from api.utils.preference_scoring import (
+            build_padded_orders,
+            calculate_preference_scores_bulk
+        )
+        
+        # Primjer pozicija "ZKG UTORAK UJUTRO"
+        sample_exhibition = exhibitions.get("ZKG")
+        sample_day = 1  # Utorak (0=Pon, 1=Uto, ...)
+        
+        # Svi cuvari odjednom (NumPy)
+        priority_arr = np.fromiter(
+            (g.priority_number for g in guards), dtype=np.float64, count=len(guards)
+        )
+        min_p, max_p = priority_arr.min(), priority_arr.max()
+        
+        # Priority normalized (60% weight)
+        if max_p > min_p:
+            p_norm_arr = (priority_arr - min_p) / (max_p - min_p)
+        else:
+            p_norm_arr = np.full(len(guards), 0.5)
+        
+        # Exhibition i day preference (20% weight svaki) - matrice za sve cuvare
+        # iz vec dohvacenih template preferencija, bez upita po cuvaru:
+        # exh_matrix (cuvari x izlozbe), day_matrix (cuvari x 7 dana), raw 0-2
+        exh_orders = build_padded_orders([
+            exh_pref_by_guard[guard.id].exhibition_order if guard.id in exh_pref_by_guard else None
+            for guard in guards
+        ])
+        day_orders = build_padded_orders([
+            day_pref_by_guard[guard.id].day_order if guard.id in day_pref_by_guard else None
+            for guard in guards
+        ], width=7)
+        exh_matrix = np.column_stack([
+            calculate_preference_scores_bulk(exh_orders, exh.id) for _, exh in ex_items
+        ])
+        day_matrix = np.column_stack([
+            calculate_preference_scores_bulk(day_orders, day) for day in range(7)
+        ])
+        
+        exh_raw_arr = exh_matrix[:, list(exhibitions).index("ZKG")]
+        day_raw_arr = day_matrix[:, sample_day]
+        
+        # Ukupni score = 60% priority + 20% exhibition + 20% day
+        total_score_arr = 0.6 * p_norm_arr + 0.2 * (exh_raw_arr / 2.0) + 0.2 * (day_raw_arr / 2.0)
+        
+        guard_rows = []
+        for i, (letter, guard) in enumerate(zip(letters, guards)):
+            wp_count = sum(1 for wp in guard.work_periods.all() if wp.is_template)
+            
+            exh_pref = exh_pref_by_guard.get(guard.id)
+            day_pref = day_pref_by_guard.get(guard.id)
+            
+            guard_rows.append(GuardRow(
+                letter=letter,
+                priority=priority_arr[i],
+                availability=guard.availability,
+                wp_count=wp_count,
+                ratio=f"1:{wp_count/guard.availability:.2f}" if guard.availability > 0 else "N/A",
+                exh_names=[
+                    id_to_name[eid] for eid in exh_pref.exhibition_order if eid in id_to_name
+                ] if exh_pref else None,
+                day_names=[_DAY_NAMES[d] for d in day_pref.day_order] if day_pref else None,
+                p_norm=p_norm_arr[i],
+                exh_raw=exh_raw_arr[i],
+                day_raw=day_raw_arr[i],
+                total_score=total_score_arr[i],
+            ))
+        
         # ====================================================================
         # FAZA 1: PRIKAZ ULAZNIH PODATAKA
         # ====================================================================
@@ -390,11 +672,8 @@ class TestRealisticScenario:
         print("-" * 60)
         
         total_positions_per_shift = 0
-        for name, exhibition in exhibitions.items():
-            days_open = ", ".join([
-                ["Pon", "Uto", "Sri", "Cet", "Pet", "Sub", "Ned"][d] 
-                for d in exhibition.open_on
-            ])
+        for name, exhibition in ex_items:
+            days_open = ", ".join([_DAY_NAMES[d] for d in exhibition.open_on])
             print(f"{name:<20} {exhibition.number_of_positions:<10} {days_open:<30}")
             total_positions_per_shift += exhibition.number_of_positions
         
@@ -415,34 +694,13 @@ class TestRealisticScenario:
         print(f"{'Cuvar':<8} {'Priority':<10} {'Avail.':<8} {'WP':<6} {'Omjer':<8} {'Pref. izlozbe':<20} {'Pref. dani':<15}")
         print("-" * 90)
         
-        total_availability = 0
-        for guard in guards:
-            letter = guard.user.username.split("_")[1]
-            wp_count = GuardWorkPeriod.objects.filter(guard=guard, is_template=True).count()
-            ratio = f"1:{wp_count/guard.availability:.2f}" if guard.availability > 0 else "N/A"
-            
-            # Dohvati preferencije izlozbi
-            try:
-                exh_pref = GuardExhibitionPreference.objects.get(guard=guard, is_template=True)
-                exh_names = []
-                for eid in exh_pref.exhibition_order:
-                    for name, exh in exhibitions.items():
-                        if exh.id == eid:
-                            exh_names.append(name)
-                exh_pref_str = ", ".join(exh_names) if exh_names else "-"
-            except GuardExhibitionPreference.DoesNotExist:
-                exh_pref_str = "-"
-            
-            # Dohvati preferencije dana
-            try:
-                day_pref = GuardDayPreference.objects.get(guard=guard, is_template=True)
-                day_names = [["Pon", "Uto", "Sri", "Cet", "Pet", "Sub", "Ned"][d] for d in day_pref.day_order]
-                day_pref_str = ", ".join(day_names)
-            except GuardDayPreference.DoesNotExist:
-                day_pref_str = "-"
-            
-            print(f"{letter:<8} {float(guard.priority_number):<10.2f} {guard.availability:<8} {wp_count:<6} {ratio:<8} {exh_pref_str:<20} {day_pref_str:<15}")
-            total_availability += guard.availability
+        rows = []
+        for row in guard_rows:
+            exh_pref_str = ", ".join(row.exh_names) if row.exh_names else "-"
+            day_pref_str = ", ".join(row.day_names) if row.day_names is not None else "-"
+            rows.append(_GUARD_ROW_FMT(row.letter, row.priority, row.availability, row.wp_count, row.ratio, exh_pref_str, day_pref_str))
+        _write_rows(rows)
+        total_availability = sum(row.availability for row in guard_rows)
         
         print("-" * 90)
         print(f"{'UKUPNO availability:':<28} {total_availability}")
@@ -486,71 +744,42 @@ Gdje je:
 +-----------------------------------------------------------------------------+
         """)
         
-        # Izracunaj normalizirane prioritete za prikaz
-        priorities = [float(g.priority_number) for g in guards]
-        min_p, max_p = min(priorities), max(priorities)
-        
+        # Normalizirani prioriteti su izracunati gore (p_norm)
         print(f"\n[INFO] Raspon prioriteta: min={min_p:.2f}, max={max_p:.2f}")
         
         print("\n[NORMALIZIRANI PRIORITETI] - svi cuvari:")
         print("-" * 70)
         print(f"{'Cuvar':<8} {'Priority':<12} {'Normalized':<12} {'Doprinos (60%)':<15}")
         print("-" * 70)
-        for guard in guards:
-            letter = guard.user.username.split("_")[1]
-            p = float(guard.priority_number)
-            if max_p > min_p:
-                norm = (p - min_p) / (max_p - min_p)
-            else:
-                norm = 0.5
-            priority_contrib = 0.6 * norm
-            print(f"{letter:<8} {p:<12.2f} {norm:<12.3f} {priority_contrib:<15.3f}")
+        _write_rows([
+            _NORM_ROW_FMT(row.letter, row.priority, row.p_norm, 0.6 * row.p_norm)
+            for row in guard_rows
+        ])
         print("-" * 70)
         
         # ====================================================================
         # PRIKAZ KAKO SU CUVARI POREDALI PREFERENCIJE
         # ====================================================================
-        from api.utils.preference_scoring import (
-            calculate_exhibition_preference_score,
-            calculate_day_preference_score
-        )
-        
         print("\n")
         print("=" * 80)
         print("KAKO SU CUVARI POREDALI PREFERENCIJE")
         print("=" * 80)
         
-        day_names = ["Pon", "Uto", "Sri", "Cet", "Pet", "Sub", "Ned"]
-        
         # Prikaz exhibition preferenci
         print("\n[A] PREFERENCIJE IZLOZBI (kako je cuvar rangirao):")
         print("-" * 80)
-        for guard in guards:
-            letter = guard.user.username.split("_")[1]
-            try:
-                exh_pref = GuardExhibitionPreference.objects.get(guard=guard, is_template=True)
-                exh_names = []
-                for eid in exh_pref.exhibition_order:
-                    for name, exh in exhibitions.items():
-                        if exh.id == eid:
-                            exh_names.append(name)
-                            break
-                pref_str = " > ".join(exh_names) if exh_names else "nema preferenci"
-                print(f"  Cuvar {letter}: {pref_str}")
-            except GuardExhibitionPreference.DoesNotExist:
-                print(f"  Cuvar {letter}: nema preferenci")
+        _write_rows([
+            f"  Cuvar {row.letter}: {' > '.join(row.exh_names) if row.exh_names else 'nema preferenci'}"
+            for row in guard_rows
+        ])
         
         # Prikaz day preferenci
         print("\n[B] PREFERENCIJE DANA (kako je cuvar rangirao):")
         print("-" * 80)
-        for guard in guards:
-            letter = guard.user.username.split("_")[1]
-            try:
-                day_pref = GuardDayPreference.objects.get(guard=guard, is_template=True)
-                day_str = " > ".join([day_names[d] for d in day_pref.day_order])
-                print(f"  Cuvar {letter}: {day_str}")
-            except GuardDayPreference.DoesNotExist:
-                print(f"  Cuvar {letter}: nema preferenci")
+        _write_rows([
+            f"  Cuvar {row.letter}: {' > '.join(row.day_names) if row.day_names is not None else 'nema preferenci'}"
+            for row in guard_rows
+        ])
         
         # Prikaz range-a preferenci
         print("\n[C] RANGE PREFERENCE SCOROVA:")
@@ -579,45 +808,20 @@ Gdje je n = ukupan broj preferenci, rank = pozicija (1-indexed)
         print("PRIMJER: SCORE ZA KONKRETNU POZICIJU - 'ZKG UTORAK UJUTRO'")
         print("=" * 120)
         
-        sample_exhibition = exhibitions.get("ZKG")
-        sample_day = 1  # Utorak (0=Pon, 1=Uto, ...)
-        
-        print(f"\nPozicija: {sample_exhibition.name}, Dan: {day_names[sample_day]}, Smjena: Jutro")
+        print(f"\nPozicija: {sample_exhibition.name}, Dan: {_DAY_NAMES[sample_day]}, Smjena: Jutro")
         print("\nSvi cuvari sa detaljnim izracunom score-a:")
         print("-" * 120)
         print(f"{'Cuvar':<6} | {'Priority':<8} | {'P.Norm':<7} | {'Exh.Raw':<8} | {'Exh.Norm':<9} | {'Day.Raw':<8} | {'Day.Norm':<9} | {'UKUPNI SCORE':<12}")
         print(f"{'':>6} | {'broj':<8} | {'0-1':<7} | {'0-2':<8} | {'0-1':<9} | {'0-2':<8} | {'0-1':<9} | {'(P+E+D)':<12}")
         print("-" * 120)
         
-        for guard in guards:
-            letter = guard.user.username.split("_")[1]
-            p = float(guard.priority_number)
-            
-            # Priority normalized (60% weight)
-            if max_p > min_p:
-                p_norm = (p - min_p) / (max_p - min_p)
-            else:
-                p_norm = 0.5
-            p_contrib = 0.6 * p_norm
-            
-            # Exhibition preference (20% weight)
-            exh_raw = calculate_exhibition_preference_score(
-                guard, sample_exhibition, None  # None jer koristimo template
+        _write_rows([
+            _PRIMJER_ROW_FMT(
+                row.letter, row.priority, row.p_norm,
+                row.exh_raw, row.exh_raw / 2.0, row.day_raw, row.day_raw / 2.0, row.total_score
             )
-            exh_norm = exh_raw / 2.0
-            exh_contrib = 0.2 * exh_norm
-            
-            # Day preference (20% weight)
-            day_raw = calculate_day_preference_score(
-                guard, sample_day, None  # None jer koristimo template
-            )
-            day_norm = day_raw / 2.0
-            day_contrib = 0.2 * day_norm
-            
-            # Ukupni score = 60% priority + 20% exhibition + 20% day
-            total_score = p_contrib + exh_contrib + day_contrib
-            
-            print(f"{letter:<6} | {p:<8.2f} | {p_norm:<7.3f} | {exh_raw:<8.2f} | {exh_norm:<9.3f} | {day_raw:<8.2f} | {day_norm:<9.3f} | {total_score:<12.3f}")
+            for row in guard_rows
+        ])
         
         print("-" * 120)
         print("""
@@ -633,36 +837,19 @@ LEGENDA:
 VISI UKUPNI SCORE = VECE SANSE ZA DODJELU TE POZICIJE
         """)
         
-        # ====================================================================
-        # FAZA 3: POKRETANJE ALGORITMA
-        # ====================================================================
-        
+        return letters, total_availability
+    
+    def _print_capping_report(self, guards, letters, positions_before, total_availability, availability_caps):
+        """FAZA 3 (prije dodjele): broj pozicija i availability capping."""
         print("\n")
         print("=" * 80)
         print("FAZA 3: POKRETANJE ALGORITMA DODJELE")
         print("=" * 80)
         
-        # Dohvati pozicije prije dodjele
-        positions_before = Position.objects.filter(
-            date__gte=settings.next_week_start,
-            date__lte=settings.next_week_end,
-            exhibition__is_special_event=False
-        ).count()
-        
         print(f"\n[INFO] Pozicija za dodjelu: {positions_before}")
         print(f"   Cuvara s availability: {len(guards)}")
         print(f"   Ukupni availability: {total_availability}")
         
-        # ================================================================
-        # AVAILABILITY CAPPING
-        # ================================================================
-        # Ako je ukupni availability > broj pozicija, moramo "cap-ati"
-        # availability svakog cuvara proporcionalno kako bi svi imali
-        # fer sansu za dodjelu.
-        # ================================================================
-        
-        availability_caps = calculate_availability_caps(guards, positions_before)
-        
         if availability_caps:
             print("\n[CAPPING] Availability capping primijenjen:")
             print("-" * 60)
@@ -670,8 +857,7 @@ VISI UKUPNI SCORE = VECE SANSE ZA DODJELU TE POZICIJE
             print("-" * 60)
             
             total_capped = 0
-            for guard in guards:
-                letter = guard.user.username.split("_")[1]
+            for letter, guard in zip(letters, guards):
                 original = guard.availability
                 capped = availability_caps.get(guard.id, original)
                 diff = original - capped
@@ -685,9 +871,11 @@ VISI UKUPNI SCORE = VECE SANSE ZA DODJELU TE POZICIJE
             print("\n[INFO] Capping nije potreban - availability <= pozicija")
         
         print("\n[WAIT] Pokrecem automatsku dodjelu...")
-        
-        # Pokreni algoritam S CAPPINGOM
-        result = assign_positions_automatically(settings, availability_caps)
+    
+    def _print_result_report(self, settings, exhibitions, guards, letters, total_availability, result,
+                             assigned_by_guard):
+        """FAZA 3 (rezultat dodjele), FAZA 4 (analiza) i FAZA 5 (zakljucak)."""
+        ex_items = list(exhibitions.items())
         
         print(f"\n[OK] Algoritam zavrsen!")
         print(f"   Status: {result['status']}")
@@ -708,19 +896,16 @@ VISI UKUPNI SCORE = VECE SANSE ZA DODJELU TE POZICIJE
         print(f"{'Cuvar':<8} {'Priority':<10} {'Availability':<12} {'Dodijeljeno':<12} {'Iskoristeno %':<12}")
         print("-" * 70)
         
-        guard_stats = []
-        for guard in guards:
-            letter = guard.user.username.split("_")[1]
-            assigned = PositionHistory.objects.filter(
-                guard=guard,
-                action=PositionHistory.Action.ASSIGNED
-            ).count()
+        # Dodjele po cuvaru kao NumPy niz - zbroj, prosjek, min i max bez novih prolaza
+        assigned_counts = np.fromiter(
+            (assigned_by_guard.get(guard.id, 0) for guard in guards), dtype=np.int32, count=len(guards)
+        )
+        for letter, guard, assigned in zip(letters, guards, assigned_counts.tolist()):
             utilization = (assigned / guard.availability * 100) if guard.availability > 0 else 0
-            guard_stats.append((letter, float(guard.priority_number), guard.availability, assigned, utilization))
-            print(f"{letter:<8} {float(guard.priority_number):<10.2f} {guard.availability:<12} {assigned:<12} {utilization:<12.1f}")
+            print(f"{letter:<8} {guard.priority_number:<10.2f} {guard.availability:<12} {assigned:<12} {utilization:<12.1f}")
         
         print("-" * 70)
-        total_assigned = sum(s[3] for s in guard_stats)
+        total_assigned = int(assigned_counts.sum())
         print(f"{'UKUPNO':<8} {'':<10} {total_availability:<12} {total_assigned:<12}")
         
         # Statistike po izlozbi
@@ -729,18 +914,27 @@ VISI UKUPNI SCORE = VECE SANSE ZA DODJELU TE POZICIJE
         print(f"{'Izlozba':<20} {'Pozicija ukupno':<16} {'Popunjeno':<12} {'%':<10}")
         print("-" * 60)
         
-        for name, exhibition in exhibitions.items():
-            positions = Position.objects.filter(
-                exhibition=exhibition,
+        # Ukupno i popunjeno po izlozbi - jedan GROUP BY upit umjesto 2 upita po izlozbi
+        # (distinct jer join na povijest moze vratiti vise redaka po poziciji)
+        exhibition_stats = {
+            row['exhibition_id']: row
+            for row in Position.objects.filter(
                 date__gte=settings.next_week_start,
                 date__lte=settings.next_week_end
-            )
-            filled = positions.filter(
-                id__in=PositionHistory.objects.filter(
-                    action=PositionHistory.Action.ASSIGNED
-                ).values_list('position_id', flat=True)
-            ).count()
-            total = positions.count()
+            ).values('exhibition_id').annotate(
+                total=Count('id', distinct=True),
+                filled=Count(
+                    'id',
+                    distinct=True,
+                    filter=Q(position_histories__action=PositionHistory.Action.ASSIGNED)
+                )
+            ).order_by()
+        }
+        
+        for name, exhibition in ex_items:
+            stats = exhibition_stats.get(exhibition.id, {})
+            total = stats.get('total', 0)
+            filled = stats.get('filled', 0)
             pct = (filled / total * 100) if total > 0 else 0
             print(f"{name:<20} {total:<16} {filled:<12} {pct:<10.1f}")
         
@@ -754,16 +948,15 @@ VISI UKUPNI SCORE = VECE SANSE ZA DODJELU TE POZICIJE
         print("=" * 80)
         
         # Analiziraj distribuciju
-        assigned_counts = [s[3] for s in guard_stats]
-        avg_assigned = sum(assigned_counts) / len(assigned_counts) if assigned_counts else 0
+        avg_assigned = assigned_counts.mean() if assigned_counts.size else 0
         
         print(f"""
 Algoritam je uspjesno dodijelio {total_assigned} pozicija medu {len(guards)} cuvara.
 
 KLJUCNE METRIKE:
 - Prosjecno dodijeljeno po cuvaru: {avg_assigned:.1f}
-- Maksimalno dodijeljeno: {max(assigned_counts)} (cuvar s najvise dodjela)
-- Minimalno dodijeljeno: {min(assigned_counts)} (cuvar s najmanje dodjela)
+- Maksimalno dodijeljeno: {assigned_counts.max()} (cuvar s najvise dodjela)
+- Minimalno dodijeljeno: {assigned_counts.min()} (cuvar s najmanje dodjela)
 
 KAKO ALGORITAM RADI:
 1. AVAILABILITY CAPPING: Ako ima vise availability nego pozicija,
@@ -781,33 +974,6 @@ KAKO ALGORITAM RADI:
 4. NAKON DODJELE: Priority_number se smanjuje za cuvare
    koji su dobili pozicije, balansira opterecenje kroz vrijeme.
         """)
-        
-        # ====================================================================
-        # VERIFIKACIJA (Assertions)
-        # ====================================================================
-        
-        # Re-enable logove za assertions
-        logging.disable(logging.NOTSET)
-        
-        # Osnovna provjera - algoritam je radio
-        assert result['status'] in ['success', 'warning'], \
-            f"Algoritam nije uspio: {result.get('message', 'nepoznata greska')}"
-        
-        # Provjera da su dodjele napravljene
-        assert result['assignments_created'] > 0, \
-            "Algoritam nije napravio nijednu dodjelu"
-        
-        # Provjera da nijedan cuvar nije prekoracio availability
-        for guard in guards:
-            assigned = PositionHistory.objects.filter(
-                guard=guard,
-                action=PositionHistory.Action.ASSIGNED
-            ).count()
-            assert assigned <= guard.availability, \
-                f"Cuvar {guard.user.username} ima {assigned} dodjela ali availability je {guard.availability}"
-        
-        print("\n[OK] Sve verifikacije uspjesne!")
-        print("=" * 80)
 
 
 @pytest.mark.django_db  
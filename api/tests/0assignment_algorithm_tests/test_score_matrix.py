@@ -21,7 +21,7 @@ from decimal import Decimal
 from datetime import timedelta
 import numpy as np
 
-from api.models import GuardDayPreference, GuardExhibitionPreference, Position
+from api.models import GuardDayPreference, GuardExhibitionPreference
 from background_tasks.assignment_algorithm import build_score_matrix
 
 
@@ -31,7 +31,7 @@ from background_tasks.assignment_algorithm import build_score_matrix
 
 @pytest.mark.django_db
 def test_matrix_dimensions_match_guards_and_positions(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that matrix dimensions correctly reflect guards × positions.
@@ -46,10 +46,7 @@ def test_matrix_dimensions_match_guards_and_positions(
     guard3 = create_guard_with_user('guard3', 'g3@test.com', availability=1, priority=Decimal('1.0'))
     
     guards = [guard1, guard2, guard3]
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    ))
+    positions = positions_in_week
     
     # Build matrix
     score_matrix, _, _, _ = build_score_matrix(guards, positions, settings, {})
@@ -65,7 +62,7 @@ def test_matrix_dimensions_match_guards_and_positions(
 
 @pytest.mark.django_db
 def test_guard_duplication_based_on_availability(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that guards are duplicated in the matrix based on their availability.
@@ -75,10 +72,7 @@ def test_guard_duplication_based_on_availability(
     
     guard = create_guard_with_user('test_guard', 'test@test.com', availability=4, priority=Decimal('2.0'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:5])  # Just take 5 positions
+    positions = positions_in_week[:5]  # Just take 5 positions
     
     score_matrix, _, _, _ = build_score_matrix([guard], positions, settings, {})
     
@@ -89,7 +83,7 @@ def test_guard_duplication_based_on_availability(
 
 @pytest.mark.django_db
 def test_score_normalization_range(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that all scores in the matrix are normalized to 0-1 range.
@@ -101,13 +95,10 @@ def test_score_normalization_range(
     guard1 = create_guard_with_user('guard1', 'g1@test.com', availability=2, priority=Decimal('5.0'))
     guard2 = create_guard_with_user('guard2', 'g2@test.com', availability=2, priority=Decimal('0.5'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    ))
+    positions = positions_in_week
     
     # Add preferences
-    GuardExhibitionPreference.objects.create(guard=guard1, next_week_start=settings.next_week_start, exhibition_order=[positions[0].exhibition.id])
+    GuardExhibitionPreference.objects.create(guard=guard1, next_week_start=settings.next_week_start, exhibition_order=[positions[0].exhibition_id])
     GuardDayPreference.objects.create(guard=guard1, next_week_start=settings.next_week_start, day_order=[positions[0].date.weekday()])
     
     score_matrix, _, _, _ = build_score_matrix([guard1, guard2], positions, settings, {})
@@ -121,7 +112,7 @@ def test_score_normalization_range(
 
 @pytest.mark.django_db
 def test_matrix_is_numpy_array(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that the returned matrix is a 2D numpy array.
@@ -131,10 +122,7 @@ def test_matrix_is_numpy_array(
     
     guard = create_guard_with_user('test_guard', 'test@test.com', availability=2, priority=Decimal('1.0'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:10])
+    positions = positions_in_week[:10]
     
     score_matrix, _, _, _ = build_score_matrix([guard], positions, settings, {})
     
@@ -149,7 +137,7 @@ def test_matrix_is_numpy_array(
 
 @pytest.mark.django_db
 def test_priority_values_normalized_correctly(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that priority values are normalized to 0-1 range.
@@ -171,10 +159,7 @@ def test_priority_values_normalized_correctly(
     guard_high.priority_number = Decimal('3.0')
     guard_high.save()
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:5])
+    positions = positions_in_week[:5]
     
     # Debug: Check what preference scoring returns for no preferences
     from api.utils.preference_scoring import calculate_exhibition_preference_score, calculate_day_preference_score
@@ -206,7 +191,7 @@ def test_priority_values_normalized_correctly(
 
 @pytest.mark.django_db
 def test_guards_same_priority_get_same_normalized_value(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that guards with identical priority get the same normalized priority score.
@@ -218,10 +203,7 @@ def test_guards_same_priority_get_same_normalized_value(
     guard2 = create_guard_with_user('guard2', 'g2@test.com', availability=1, priority=Decimal('2.5'))
     guard3 = create_guard_with_user('guard3', 'g3@test.com', availability=1, priority=Decimal('2.5'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:3])
+    positions = positions_in_week[:3]
     
     score_matrix, _, _, _ = build_score_matrix([guard1, guard2, guard3], positions, settings, {})
     
@@ -233,7 +215,7 @@ def test_guards_same_priority_get_same_normalized_value(
 
 @pytest.mark.django_db
 def test_priority_weight_is_60_percent(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that priority contributes 60% to the total score.
@@ -245,10 +227,7 @@ def test_priority_weight_is_60_percent(
     guard_min = create_guard_with_user('min', 'min@test.com', availability=1, priority=Decimal('0.5'))
     guard_max = create_guard_with_user('max', 'max@test.com', availability=1, priority=Decimal('3.5'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:1])
+    positions = positions_in_week[:1]
     
     score_matrix, _, _, _ = build_score_matrix([guard_min, guard_max], positions, settings, {})
     
@@ -262,7 +241,7 @@ def test_priority_weight_is_60_percent(
 
 @pytest.mark.django_db
 def test_single_guard_priority_normalization(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Edge case: single guard should get normalized priority of 1.0
@@ -272,10 +251,7 @@ def test_single_guard_priority_normalization(
     
     guard = create_guard_with_user('solo', 'solo@test.com', availability=2, priority=Decimal('2.5'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:3])
+    positions = positions_in_week[:3]
     
     score_matrix, _, _, _ = build_score_matrix([guard], positions, settings, {})
     
@@ -293,7 +269,7 @@ def test_single_guard_priority_normalization(
 
 @pytest.mark.django_db
 def test_combined_score_calculation(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that final score correctly combines priority, exhibition, and day preferences.
@@ -303,14 +279,11 @@ def test_combined_score_calculation(
     
     guard = create_guard_with_user('test_guard', 'test@test.com', availability=1, priority=Decimal('2.0'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    ))
+    positions = positions_in_week
     
     # Add top preferences for first position
     first_pos = positions[0]
-    GuardExhibitionPreference.objects.create(guard=guard, next_week_start=settings.next_week_start, exhibition_order=[first_pos.exhibition.id])
+    GuardExhibitionPreference.objects.create(guard=guard, next_week_start=settings.next_week_start, exhibition_order=[first_pos.exhibition_id])
     GuardDayPreference.objects.create(guard=guard, next_week_start=settings.next_week_start, day_order=[first_pos.date.weekday()])
     
     score_matrix, _, _, _ = build_score_matrix([guard], positions, settings, {})
@@ -324,7 +297,7 @@ def test_combined_score_calculation(
 
 @pytest.mark.django_db
 def test_score_weights_distribution(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that weights are correctly distributed: 60% priority, 20% exhibition, 20% day.
@@ -336,16 +309,18 @@ def test_score_weights_distribution(
     guard_low = create_guard_with_user('low', 'low@test.com', availability=1, priority=Decimal('1.0'))
     guard_high = create_guard_with_user('high', 'high@test.com', availability=1, priority=Decimal('3.0'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:1])
+    positions = positions_in_week[:1]
     
     # Same preferences for both
     pos = positions[0]
-    for guard in [guard_low, guard_high]:
-        GuardExhibitionPreference.objects.create(guard=guard, next_week_start=settings.next_week_start, exhibition_order=[pos.exhibition.id])
-        GuardDayPreference.objects.create(guard=guard, next_week_start=settings.next_week_start, day_order=[pos.date.weekday()])
+    GuardExhibitionPreference.objects.bulk_create([
+        GuardExhibitionPreference(guard=guard, next_week_start=settings.next_week_start, exhibition_order=[pos.exhibition_id])
+        for guard in [guard_low, guard_high]
+    ])
+    GuardDayPreference.objects.bulk_create([
+        GuardDayPreference(guard=guard, next_week_start=settings.next_week_start, day_order=[pos.date.weekday()])
+        for guard in [guard_low, guard_high]
+    ])
     
     score_matrix, _, _, _ = build_score_matrix([guard_low, guard_high], positions, settings, {})
     
@@ -356,7 +331,7 @@ def test_score_weights_distribution(
 
 @pytest.mark.django_db
 def test_score_range_validation(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that all calculated scores fall within valid 0-1 range.
@@ -368,23 +343,18 @@ def test_score_range_validation(
     guard_min = create_guard_with_user('min', 'min@test.com', availability=2, priority=Decimal('0.1'))
     guard_max = create_guard_with_user('max', 'max@test.com', availability=2, priority=Decimal('10.0'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    ))
+    positions = positions_in_week
     
     # Add extreme preferences
-    exhibitions = list(set(pos.exhibition for pos in positions))
-    GuardExhibitionPreference.objects.create(
-        guard=guard_min,
-        next_week_start=settings.next_week_start,
-        exhibition_order=[exh.id for exh in exhibitions[:3]]
-    )
-    GuardExhibitionPreference.objects.create(
-        guard=guard_max,
-        next_week_start=settings.next_week_start,
-        exhibition_order=[exh.id for exh in exhibitions[:3]]
-    )
+    exhibitions = list({pos.exhibition_id: pos.exhibition for pos in positions}.values())
+    GuardExhibitionPreference.objects.bulk_create([
+        GuardExhibitionPreference(
+            guard=guard,
+            next_week_start=settings.next_week_start,
+            exhibition_order=[exh.id for exh in exhibitions[:3]]
+        )
+        for guard in [guard_min, guard_max]
+    ])
     
     score_matrix, _, _, _ = build_score_matrix([guard_min, guard_max], positions, settings, {})
     
@@ -397,7 +367,7 @@ def test_score_range_validation(
 
 @pytest.mark.django_db
 def test_guards_no_preferences_get_baseline_scores(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that guards with no preferences get baseline scores (1.0 for pref components).
@@ -408,10 +378,7 @@ def test_guards_no_preferences_get_baseline_scores(
     guard1 = create_guard_with_user('guard1', 'g1@test.com', availability=1, priority=Decimal('1.0'))
     guard2 = create_guard_with_user('guard2', 'g2@test.com', availability=1, priority=Decimal('2.0'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:5])
+    positions = positions_in_week[:5]
     
     # No preferences added
     score_matrix, _, _, _ = build_score_matrix([guard1, guard2], positions, settings, {})
@@ -432,7 +399,7 @@ def test_guards_no_preferences_get_baseline_scores(
 
 @pytest.mark.django_db
 def test_high_preference_guards_get_higher_scores(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that guards with higher preferences (rank 1 vs rank 3) get higher scores.
@@ -443,46 +410,45 @@ def test_high_preference_guards_get_higher_scores(
     guard_high = create_guard_with_user('high', 'high@test.com', availability=1, priority=Decimal('2.0'))
     guard_low = create_guard_with_user('low', 'low@test.com', availability=1, priority=Decimal('2.0'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    ))
+    positions = positions_in_week
     
     # High preference: rank 1 for first position
     pos = positions[0]
     
     # Create multiple exhibitions for ranking
-    exhibitions = list(set(p.exhibition for p in positions))[:3]
-    
-    # guard_high: prefers pos.exhibition as rank 1
-    GuardExhibitionPreference.objects.create(
-        guard=guard_high,
-        next_week_start=settings.next_week_start,
-        exhibition_order=[pos.exhibition.id] + [ex.id for ex in exhibitions if ex.id != pos.exhibition.id][:2]
-    )
-    
-    # guard_low: prefers pos.exhibition as rank 3 (lowest)
-    other_exhibitions = [ex for ex in exhibitions if ex.id != pos.exhibition.id][:2]
-    GuardExhibitionPreference.objects.create(
-        guard=guard_low,
-        next_week_start=settings.next_week_start,
-        exhibition_order=[ex.id for ex in other_exhibitions] + [pos.exhibition.id]
-    )
+    exhibitions = list({p.exhibition_id: p.exhibition for p in positions}.values())[:3]
+    
+    other_exhibitions = [ex for ex in exhibitions if ex.id != pos.exhibition_id][:2]
+    GuardExhibitionPreference.objects.bulk_create([
+        # guard_high: prefers pos.exhibition as rank 1
+        GuardExhibitionPreference(
+            guard=guard_high,
+            next_week_start=settings.next_week_start,
+            exhibition_order=[pos.exhibition_id] + [ex.id for ex in exhibitions if ex.id != pos.exhibition_id][:2]
+        ),
+        # guard_low: prefers pos.exhibition as rank 3 (lowest)
+        GuardExhibitionPreference(
+            guard=guard_low,
+            next_week_start=settings.next_week_start,
+            exhibition_order=[ex.id for ex in other_exhibitions] + [pos.exhibition_id]
+        ),
+    ])
     
     # Same for days
     days = list(set(p.date.weekday() for p in positions))[:3]
-    GuardDayPreference.objects.create(
-        guard=guard_high,
-        next_week_start=settings.next_week_start,
-        day_order=[pos.date.weekday()] + [d for d in days if d != pos.date.weekday()][:2]
-    )
-    
     other_days = [d for d in days if d != pos.date.weekday()][:2]
-    GuardDayPreference.objects.create(
-        guard=guard_low,
-        next_week_start=settings.next_week_start,
-        day_order=other_days + [pos.date.weekday()]
-    )
+    GuardDayPreference.objects.bulk_create([
+        GuardDayPreference(
+            guard=guard_high,
+            next_week_start=settings.next_week_start,
+            day_order=[pos.date.weekday()] + [d for d in days if d != pos.date.weekday()][:2]
+        ),
+        GuardDayPreference(
+            guard=guard_low,
+            next_week_start=settings.next_week_start,
+            day_order=other_days + [pos.date.weekday()]
+        ),
+    ])
     
     score_matrix, _, _, _ = build_score_matrix([guard_high, guard_low], positions, settings, {})
     
@@ -492,7 +458,7 @@ def test_high_preference_guards_get_higher_scores(
 
 @pytest.mark.django_db
 def test_score_matrix_matches_position_order(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that matrix columns correctly correspond to position order.
@@ -502,14 +468,11 @@ def test_score_matrix_matches_position_order(
     
     guard = create_guard_with_user('test_guard', 'test@test.com', availability=1, priority=Decimal('2.0'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    ).order_by('date', 'start_time'))[:10]
+    positions = positions_in_week[:10]
     
     # Add preference for specific position
     target_pos = positions[5]  # 6th position
-    GuardExhibitionPreference.objects.create(guard=guard, next_week_start=settings.next_week_start, exhibition_order=[target_pos.exhibition.id])
+    GuardExhibitionPreference.objects.create(guard=guard, next_week_start=settings.next_week_start, exhibition_order=[target_pos.exhibition_id])
     GuardDayPreference.objects.create(guard=guard, next_week_start=settings.next_week_start, day_order=[target_pos.date.weekday()])
     
     score_matrix, _, _, _ = build_score_matrix([guard], positions, settings, {})
@@ -527,7 +490,7 @@ def test_score_matrix_matches_position_order(
 
 @pytest.mark.django_db
 def test_guard_duplicated_exactly_availability_times(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that each guard appears in matrix exactly availability times.
@@ -537,10 +500,7 @@ def test_guard_duplicated_exactly_availability_times(
     guard1 = create_guard_with_user('guard1', 'g1@test.com', availability=3, priority=Decimal('1.5'))
     guard2 = create_guard_with_user('guard2', 'g2@test.com', availability=5, priority=Decimal('2.0'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:10])
+    positions = positions_in_week[:10]
     
     score_matrix, _, _, _ = build_score_matrix([guard1, guard2], positions, settings, {})
     
@@ -553,7 +513,7 @@ def test_guard_duplicated_exactly_availability_times(
 
 @pytest.mark.django_db
 def test_each_duplicate_has_same_scores(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that all duplicates of the same guard have identical scores.
@@ -562,13 +522,10 @@ def test_each_duplicate_has_same_scores(
     
     guard = create_guard_with_user('test_guard', 'test@test.com', availability=4, priority=Decimal('2.0'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:5])
+    positions = positions_in_week[:5]
     
     # Add preferences
-    GuardExhibitionPreference.objects.create(guard=guard, next_week_start=settings.next_week_start, exhibition_order=[positions[0].exhibition.id])
+    GuardExhibitionPreference.objects.create(guard=guard, next_week_start=settings.next_week_start, exhibition_order=[positions[0].exhibition_id])
     GuardDayPreference.objects.create(guard=guard, next_week_start=settings.next_week_start, day_order=[positions[0].date.weekday()])
     
     score_matrix, _, _, _ = build_score_matrix([guard], positions, settings, {})
@@ -576,12 +533,12 @@ def test_each_duplicate_has_same_scores(
     # All 4 rows should be identical (same guard, duplicated 4 times)
     assert score_matrix.shape[0] == 4
     for i in range(1, 4):
-        assert np.allclose(score_matrix[0, :], score_matrix[i, :])
+        assert np.array_equal(score_matrix[0, :], score_matrix[i, :])
 
 
 @pytest.mark.django_db
 def test_duplicates_appear_consecutively(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that duplicates of the same guard appear in consecutive rows.
@@ -591,10 +548,7 @@ def test_duplicates_appear_consecutively(
     guard1 = create_guard_with_user('guard1', 'g1@test.com', availability=2, priority=Decimal('1.0'))
     guard2 = create_guard_with_user('guard2', 'g2@test.com', availability=3, priority=Decimal('2.0'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:5])
+    positions = positions_in_week[:5]
     
     score_matrix, _, _, _ = build_score_matrix([guard1, guard2], positions, settings, {})
     
@@ -602,11 +556,11 @@ def test_duplicates_appear_consecutively(
     # Rows 2-4: guard2 (should be identical)
     
     # Check guard1 duplicates
-    assert np.allclose(score_matrix[0, :], score_matrix[1, :])
+    assert np.array_equal(score_matrix[0, :], score_matrix[1, :])
     
     # Check guard2 duplicates
-    assert np.allclose(score_matrix[2, :], score_matrix[3, :])
-    assert np.allclose(score_matrix[3, :], score_matrix[4, :])
+    assert np.array_equal(score_matrix[2, :], score_matrix[3, :])
+    assert np.array_equal(score_matrix[3, :], score_matrix[4, :])
     
     # Guard1 and guard2 should have different scores (different priorities)
     assert not np.allclose(score_matrix[0, :], score_matrix[2, :])
@@ -614,7 +568,7 @@ def test_duplicates_appear_consecutively(
 
 @pytest.mark.django_db
 def test_availability_zero_means_no_entries(
-    create_guard_with_user, system_settings_for_assignment, sample_exhibitions
+    create_guard_with_user, system_settings_for_assignment, positions_in_week
 ):
     """
     Test that guards with availability=0 don't appear in the matrix.
@@ -624,10 +578,7 @@ def test_availability_zero_means_no_entries(
     guard_available = create_guard_with_user('available', 'avail@test.com', availability=2, priority=Decimal('2.0'))
     guard_unavailable = create_guard_with_user('unavailable', 'unavail@test.com', availability=0, priority=Decimal('1.5'))
     
-    positions = list(Position.objects.filter(
-        date__gte=settings.next_week_start,
-        date__lte=settings.next_week_end
-    )[:5])
+    positions = positions_in_week[:5]
     
     # Matrix should only include available guard
     score_matrix, _, _, _ = build_score_matrix([guard_available, guard_unavailable], positions, settings, {})
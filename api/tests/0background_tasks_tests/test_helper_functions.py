@@ -8,6 +8,7 @@ These tests cover utility functions used by Celery tasks:
 - _get_available_work_periods_for_week
 - get_average_points_for_week
 - calculate_guard_priority
+- get_weekly_point_totals
 - assign_initial_priority_to_new_guard
 - calculate_availability_caps
 - get_guards_with_availability_updated
@@ -21,6 +22,8 @@ These tests cover utility functions used by Celery tasks:
 import pytest
 from datetime import datetime, date, time, timedelta
 from decimal import Decimal
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from freezegun import freeze_time
@@ -32,6 +35,7 @@ from background_tasks.tasks import (
     _get_available_work_periods_for_week,
     get_average_points_for_week,
     calculate_guard_priority,
+    get_weekly_point_totals,
     assign_initial_priority_to_new_guard,
     calculate_availability_caps,
     get_guards_with_availability_updated,
@@ -59,6 +63,46 @@ from api.api_models.preferences import GuardExhibitionPreference, GuardDayPrefer
 User = get_user_model()
 
 
+@pytest.fixture
+def guard(guard_user):
+    """Guard profile of guard_user (cached on the user when the signal created it - no query)."""
+    return guard_user.guard
+
+
+@pytest.fixture
+def feb_exhibition(system_settings):
+    """
+    Stock exhibition open Tuesday-Friday through February 2026.
+    
+    Shared by tests that only need some exhibition for their positions,
+    instead of each creating its own.
+    """
+    return Exhibition.objects.create(
+        name='February Exhibition',
+        number_of_positions=1,
+        start_date=timezone.make_aware(datetime(2026, 2, 1)),
+        end_date=timezone.make_aware(datetime(2026, 2, 28)),
+        open_on=[1, 2, 3, 4]
+    )
+
+
+@pytest.fixture
+def task_now(monkeypatch):
+    """
+    Set current time seen by background tasks (background_tasks.tasks._now).
+    
+    Cheaper than freeze_time, which patches time functions in every loaded
+    module. Keep freeze_time where model auto fields must see the frozen time.
+    
+    Usage:
+        task_now(datetime(2026, 2, 3, 12, 0))
+    """
+    def set_now(dt):
+        now = timezone.make_aware(dt)
+        monkeypatch.setattr('background_tasks.tasks._now', lambda: now)
+    return set_now
+
+
 # ============================================================================
 # Tests for _get_week_from_datetime
 # ============================================================================
@@ -118,12 +162,15 @@ class TestGetExhibitionsForWeek:
             end_time=time(14, 0)
         )
         
-        result = _get_exhibitions_for_week(
-            system_settings.next_week_start,
-            system_settings.next_week_end
-        )
+        with CaptureQueriesContext(connection) as ctx:
+            result = _get_exhibitions_for_week(
+                system_settings.next_week_start,
+                system_settings.next_week_end
+            )
         
         assert exhibition.id in result
+        # Single DISTINCT query on Position
+        assert len(ctx.captured_queries) == 1
     
     def test_returns_empty_set_when_no_positions(self, system_settings):
         """Test that function returns empty set when no positions exist."""
@@ -168,18 +215,10 @@ class TestGetWorkdaysForWeek:
         tuesday = system_settings.next_week_start + timedelta(days=1)
         thursday = system_settings.next_week_start + timedelta(days=3)
         
-        Position.objects.create(
-            exhibition=exhibition,
-            date=tuesday,
-            start_time=time(10, 0),
-            end_time=time(14, 0)
-        )
-        Position.objects.create(
-            exhibition=exhibition,
-            date=thursday,
-            start_time=time(10, 0),
-            end_time=time(14, 0)
-        )
+        Position.objects.bulk_create([
+            Position(exhibition=exhibition, date=day, start_time=time(10, 0), end_time=time(14, 0))
+            for day in (tuesday, thursday)
+        ])
         
         result = _get_workdays_for_week(
             system_settings.next_week_start,
@@ -222,9 +261,7 @@ class TestAssignInitialPriorityToNewGuard:
             password='test123',
             role=User.ROLE_GUARD
         )
-        guard1 = Guard.objects.get(user=user1)
-        guard1.priority_number = Decimal('5.0')
-        guard1.save()
+        Guard.objects.filter(user=user1).update(priority_number=Decimal('5.0'))
         
         # Create second guard with priority 3.0
         user2 = User.objects.create_user(
@@ -233,9 +270,7 @@ class TestAssignInitialPriorityToNewGuard:
             password='test123',
             role=User.ROLE_GUARD
         )
-        guard2 = Guard.objects.get(user=user2)
-        guard2.priority_number = Decimal('3.0')
-        guard2.save()
+        Guard.objects.filter(user=user2).update(priority_number=Decimal('3.0'))
         
         # Create third guard - should get average of (5.0 + 3.0) / 2 = 4.0
         user3 = User.objects.create_user(
@@ -252,6 +287,36 @@ class TestAssignInitialPriorityToNewGuard:
         assert guard3.priority_number is not None
 
 
+@pytest.fixture(scope='class')
+def class_guards(django_db_setup, django_db_blocker):
+    """
+    Two guards (cap_guard1, cap_guard2) created once per test class.
+    
+    Created in an outer transaction that is rolled back after the class's
+    last test. Each test runs in its own savepoint, so fields set with
+    update() are reset before the next test.
+    
+    Users and guards are bulk-inserted, which skips the post_save signal
+    (Guard profile creation and initial priority), so Guard rows are created
+    explicitly with the priority the signal would assign.
+    """
+    from django.contrib.auth.hashers import make_password
+    
+    with django_db_blocker.unblock():
+        with transaction.atomic():
+            password = make_password('test')
+            users = User.objects.bulk_create([
+                User(username=f'cap_guard{i}', email=f'cg{i}@test.com',
+                     password=password, role=User.ROLE_GUARD)
+                for i in (1, 2)
+            ])
+            guards = Guard.objects.bulk_create([
+                Guard(user=user, priority_number=Decimal('1.0')) for user in users
+            ])
+            yield guards
+            transaction.set_rollback(True)
+
+
 # ============================================================================
 # Tests for calculate_availability_caps
 # ============================================================================
@@ -260,26 +325,12 @@ class TestAssignInitialPriorityToNewGuard:
 class TestCalculateAvailabilityCaps:
     """Tests for calculate_availability_caps function."""
     
-    def test_no_capping_when_supply_exceeds_demand(self, system_settings):
+    def test_no_capping_when_supply_exceeds_demand(self, system_settings, class_guards):
         """Test that no capping occurs when there are more positions than availability."""
-        # Create guards with low availability
-        user1 = User.objects.create_user(
-            username='cap_guard1', email='cg1@test.com',
-            password='test', role=User.ROLE_GUARD
-        )
-        guard1 = Guard.objects.get(user=user1)
-        guard1.availability = 3
-        guard1.priority_number = Decimal('5.0')
-        guard1.save()
-        
-        user2 = User.objects.create_user(
-            username='cap_guard2', email='cg2@test.com',
-            password='test', role=User.ROLE_GUARD
-        )
-        guard2 = Guard.objects.get(user=user2)
-        guard2.availability = 2
-        guard2.priority_number = Decimal('4.0')
-        guard2.save()
+        # Guards with low availability
+        guard1, guard2 = class_guards
+        Guard.objects.filter(id=guard1.id).update(availability=3, priority_number=Decimal('5.0'))
+        Guard.objects.filter(id=guard2.id).update(availability=2, priority_number=Decimal('4.0'))
         
         guards = Guard.objects.filter(id__in=[guard1.id, guard2.id])
         total_positions = 10  # More than demand (3+2=5)
@@ -290,25 +341,11 @@ class TestCalculateAvailabilityCaps:
         assert caps[guard1.id] == 3
         assert caps[guard2.id] == 2
     
-    def test_capping_reduces_high_availability_first(self, system_settings):
+    def test_capping_reduces_high_availability_first(self, system_settings, class_guards):
         """Test that capping reduces highest availability first."""
-        user1 = User.objects.create_user(
-            username='high_avail', email='high@test.com',
-            password='test', role=User.ROLE_GUARD
-        )
-        guard1 = Guard.objects.get(user=user1)
-        guard1.availability = 5
-        guard1.priority_number = Decimal('3.0')
-        guard1.save()
-        
-        user2 = User.objects.create_user(
-            username='low_avail', email='low@test.com',
-            password='test', role=User.ROLE_GUARD
-        )
-        guard2 = Guard.objects.get(user=user2)
-        guard2.availability = 2
-        guard2.priority_number = Decimal('4.0')
-        guard2.save()
+        guard1, guard2 = class_guards
+        Guard.objects.filter(id=guard1.id).update(availability=5, priority_number=Decimal('3.0'))
+        Guard.objects.filter(id=guard2.id).update(availability=2, priority_number=Decimal('4.0'))
         
         guards = Guard.objects.filter(id__in=[guard1.id, guard2.id])
         total_positions = 5  # Less than demand (5+2=7)
@@ -331,7 +368,7 @@ class TestCalculateAvailabilityCaps:
 class TestGetGuardsWithAvailabilityUpdated:
     """Tests for get_guards_with_availability_updated function."""
     
-    def test_returns_guards_who_updated_in_config_window(self, system_settings, mocker):
+    def test_returns_guards_who_updated_in_config_window(self, system_settings, class_guards, mocker):
         """Test that function returns guards who updated availability in config window."""
         # Mock timezone.now to be within config window
         config_time = datetime.combine(
@@ -341,21 +378,14 @@ class TestGetGuardsWithAvailabilityUpdated:
         config_time = timezone.make_aware(config_time)
         mocker.patch('django.utils.timezone.now', return_value=config_time)
         
-        # Create guard
-        user = User.objects.create_user(
-            username='avail_guard', email='avail@test.com',
-            password='test', role=User.ROLE_GUARD
-        )
-        guard = Guard.objects.get(user=user)
-        guard.availability = 5
-        guard.availability_updated_at = config_time
-        guard.save()
+        guard = class_guards[0]
+        Guard.objects.filter(id=guard.id).update(availability=5, availability_updated_at=config_time)
         
         result = get_guards_with_availability_updated()
         
         assert guard in result
     
-    def test_excludes_guards_with_zero_availability(self, system_settings, mocker):
+    def test_excludes_guards_with_zero_availability(self, system_settings, class_guards, mocker):
         """Test that guards with availability=0 are excluded."""
         config_time = datetime.combine(
             system_settings.this_week_start + timedelta(days=1),
@@ -364,14 +394,8 @@ class TestGetGuardsWithAvailabilityUpdated:
         config_time = timezone.make_aware(config_time)
         mocker.patch('django.utils.timezone.now', return_value=config_time)
         
-        user = User.objects.create_user(
-            username='zero_guard', email='zero@test.com',
-            password='test', role=User.ROLE_GUARD
-        )
-        guard = Guard.objects.get(user=user)
-        guard.availability = 0
-        guard.availability_updated_at = config_time
-        guard.save()
+        guard = class_guards[0]
+        Guard.objects.filter(id=guard.id).update(availability=0, availability_updated_at=config_time)
         
         result = get_guards_with_availability_updated()
         
@@ -465,7 +489,7 @@ class TestGenerateWeeklyPositions:
             date__gte=system_settings.next_week_start,
             date__lte=system_settings.next_week_end
         )
-        assert positions.count() > 0
+        assert positions.exists()
     
     @freeze_time("2026-02-02 00:01:00")
     def test_skips_non_working_days(self, system_settings):
@@ -501,22 +525,31 @@ class TestGenerateWeeklyPositions:
             exhibition=exhibition,
             date=date(2026, 2, 10)
         )
-        assert tuesday_positions.count() == 0
+        assert not tuesday_positions.exists()
 
 
 # ============================================================================
 # Tests for award_daily_completions
 # ============================================================================
 
+def _points_summary(guard):
+    """Number and sum of a guard's Point entries in a single aggregate query."""
+    from django.db.models import Count, Sum
+    from django.db.models.functions import Coalesce
+    
+    return Point.objects.filter(guard=guard).aggregate(
+        count=Count('id'),
+        total=Coalesce(Sum('points'), Decimal('0.00'))
+    )
+
+
 @pytest.mark.django_db
 class TestAwardDailyCompletions:
     """Tests for award_daily_completions Celery task."""
     
     @freeze_time("2026-02-10 23:00:00")  # Tuesday 23:00
-    def test_awards_points_for_completed_positions(self, system_settings, guard_user):
+    def test_awards_points_for_completed_positions(self, system_settings, guard):
         """Test that guards get points for completed positions."""
-        guard = Guard.objects.get(user=guard_user)
-        
         exhibition = Exhibition.objects.create(
             name='Completion Test',
             number_of_positions=1,
@@ -540,19 +573,18 @@ class TestAwardDailyCompletions:
             action=PositionHistory.Action.ASSIGNED
         )
         
-        initial_points_count = Point.objects.filter(guard=guard).count()
+        before = _points_summary(guard)
         
         result = award_daily_completions()
         
-        # Should have created point entry
-        new_points_count = Point.objects.filter(guard=guard).count()
-        assert new_points_count > initial_points_count
+        # Should have created one point entry worth the completion award
+        after = _points_summary(guard)
+        assert after['count'] == before['count'] + 1
+        assert after['total'] == before['total'] + Decimal(str(system_settings.award_for_position_completion))
     
     @freeze_time("2026-02-15 23:00:00")  # Sunday 23:00
-    def test_awards_reduced_points_for_sunday(self, system_settings, guard_user):
+    def test_awards_reduced_points_for_sunday(self, system_settings, guard):
         """Test that Sunday positions get reduced points."""
-        guard = Guard.objects.get(user=guard_user)
-        
         # Add Sunday to workdays for this test
         system_settings.workdays = [0, 1, 2, 3, 4, 5, 6]
         system_settings.save()
@@ -598,11 +630,8 @@ class TestAwardDailyCompletions:
 class TestPenalizeInsufficientPositions:
     """Tests for penalize_insufficient_positions Celery task."""
     
-    @freeze_time("2026-02-08 10:00:00")  # Sunday after manual window
-    def test_penalizes_guards_with_insufficient_positions(self, system_settings, guard_user):
+    def test_penalizes_guards_with_insufficient_positions(self, system_settings, guard):
         """Test that guards with too few positions get penalized."""
-        guard = Guard.objects.get(user=guard_user)
-        
         # Set minimum to 3
         system_settings.minimal_number_of_positions_in_week = 3
         system_settings.next_week_start = date(2026, 2, 9)
@@ -623,38 +652,27 @@ class TestPenalizeInsufficientPositions:
             points__lt=0
         ).count()
         assert new_penalty_count > initial_penalty_count
+        assert Point.objects.filter(
+            guard=guard,
+            reason=Point.Reason.INSUFFICIENT_POSITIONS
+        ).exists()
     
-    @freeze_time("2026-02-08 10:00:00")
-    def test_no_penalty_if_guard_meets_minimum(self, system_settings, guard_user):
+    def test_no_penalty_if_guard_meets_minimum(self, system_settings, guard, feb_exhibition):
         """Test that guards meeting minimum don't get penalized."""
-        guard = Guard.objects.get(user=guard_user)
-        
         system_settings.minimal_number_of_positions_in_week = 2
         system_settings.next_week_start = date(2026, 2, 9)
         system_settings.next_week_end = date(2026, 2, 15)
         system_settings.save()
         
-        exhibition = Exhibition.objects.create(
-            name='Min Test',
-            number_of_positions=1,
-            start_date=timezone.make_aware(datetime(2026, 2, 1)),
-            end_date=timezone.make_aware(datetime(2026, 2, 28)),
-            open_on=[1, 2, 3, 4]
-        )
-        
-        # Create 2 positions and assign guard
-        for i in range(2):
-            position = Position.objects.create(
-                exhibition=exhibition,
-                date=date(2026, 2, 10 + i),
-                start_time=time(10, 0),
-                end_time=time(14, 0)
-            )
-            PositionHistory.objects.create(
-                position=position,
-                guard=guard,
-                action=PositionHistory.Action.ASSIGNED
-            )
+        # Create 2 positions and assign guard (one INSERT per table)
+        positions = Position.objects.bulk_create([
+            Position(exhibition=feb_exhibition, date=date(2026, 2, 10 + i), start_time=time(10, 0), end_time=time(14, 0))
+            for i in range(2)
+        ])
+        PositionHistory.objects.bulk_create([
+            PositionHistory(position=position, guard=guard, action=PositionHistory.Action.ASSIGNED)
+            for position in positions
+        ])
         
         initial_count = Point.objects.filter(guard=guard).count()
         
@@ -664,9 +682,9 @@ class TestPenalizeInsufficientPositions:
         # (guard has 2 positions, minimum is 2)
         penalty_points = Point.objects.filter(
             guard=guard,
-            explanation__icontains='nedovoljno'
+            reason=Point.Reason.INSUFFICIENT_POSITIONS
         )
-        assert penalty_points.count() == 0
+        assert not penalty_points.exists()
 
 
 # ============================================================================
@@ -678,10 +696,8 @@ class TestValidatePreferenceTemplates:
     """Tests for validate_preference_templates Celery task."""
     
     @freeze_time("2026-02-09 00:10:00")  # Monday after position generation
-    def test_invalidates_exhibition_template_when_exhibitions_change(self, system_settings, guard_user):
+    def test_invalidates_exhibition_template_when_exhibitions_change(self, system_settings, guard):
         """Test that exhibition preference template is invalidated when exhibition set changes."""
-        guard = Guard.objects.get(user=guard_user)
-        
         system_settings.next_week_start = date(2026, 2, 16)  # Week after next
         system_settings.next_week_end = date(2026, 2, 22)
         system_settings.save()
@@ -724,10 +740,8 @@ class TestValidatePreferenceTemplates:
         assert pref.is_template is False
     
     @freeze_time("2026-02-09 00:10:00")
-    def test_keeps_template_when_exhibitions_same(self, system_settings, guard_user):
+    def test_keeps_template_when_exhibitions_same(self, system_settings, guard):
         """Test that exhibition preference template stays valid when exhibition set unchanged."""
-        guard = Guard.objects.get(user=guard_user)
-        
         # next_week = historical week (both 2026-02-09 to 2026-02-15)
         # created_at = 2026-02-02 -> historical = 2026-02-09 to 2026-02-15
         system_settings.next_week_start = date(2026, 2, 9)
@@ -766,10 +780,8 @@ class TestValidatePreferenceTemplates:
         assert pref.is_template is True
     
     @freeze_time("2026-02-09 00:10:00")
-    def test_creates_notification_when_template_invalidated(self, system_settings, guard_user):
+    def test_creates_notification_when_template_invalidated(self, system_settings, guard):
         """Test that notification is created when template is invalidated."""
-        guard = Guard.objects.get(user=guard_user)
-        
         # Historical = 2026-02-09 to 2026-02-15 (created_at 2026-02-02 + 7 days)
         # next_week = 2026-02-16 to 2026-02-22 (different from historical)
         system_settings.next_week_start = date(2026, 2, 16)
@@ -822,21 +834,11 @@ class TestValidatePreferenceTemplates:
 class TestExpireSwapRequests:
     """Tests for expire_swap_requests Celery task."""
     
-    @freeze_time("2026-02-03 12:00:00")  # After position start time
-    def test_expires_pending_swap_past_deadline(self, system_settings, guard_user):
+    def test_expires_pending_swap_past_deadline(self, system_settings, guard, feb_exhibition, task_now):
         """Test that pending swap requests past deadline are expired."""
-        guard = Guard.objects.get(user=guard_user)
-        
-        exhibition = Exhibition.objects.create(
-            name='Swap Test',
-            number_of_positions=1,
-            start_date=timezone.make_aware(datetime(2026, 2, 1)),
-            end_date=timezone.make_aware(datetime(2026, 2, 28)),
-            open_on=[1, 2, 3, 4]
-        )
-        
+        task_now(datetime(2026, 2, 3, 12, 0))  # After position start time
         position = Position.objects.create(
-            exhibition=exhibition,
+            exhibition=feb_exhibition,
             date=date(2026, 2, 3),
             start_time=time(10, 0),
             end_time=time(14, 0)
@@ -862,21 +864,11 @@ class TestExpireSwapRequests:
         swap_request.refresh_from_db()
         assert swap_request.status == 'expired'
     
-    @freeze_time("2026-02-03 09:00:00")  # Before position start time
-    def test_does_not_expire_pending_swap_before_deadline(self, system_settings, guard_user):
+    def test_does_not_expire_pending_swap_before_deadline(self, system_settings, guard, feb_exhibition, task_now):
         """Test that pending swap requests before deadline are not expired."""
-        guard = Guard.objects.get(user=guard_user)
-        
-        exhibition = Exhibition.objects.create(
-            name='Swap Test 2',
-            number_of_positions=1,
-            start_date=timezone.make_aware(datetime(2026, 2, 1)),
-            end_date=timezone.make_aware(datetime(2026, 2, 28)),
-            open_on=[1, 2, 3, 4]
-        )
-        
+        task_now(datetime(2026, 2, 3, 9, 0))  # Before position start time
         position = Position.objects.create(
-            exhibition=exhibition,
+            exhibition=feb_exhibition,
             date=date(2026, 2, 3),
             start_time=time(10, 0),
             end_time=time(14, 0)
@@ -901,21 +893,11 @@ class TestExpireSwapRequests:
         swap_request.refresh_from_db()
         assert swap_request.status == 'pending'
     
-    @freeze_time("2026-02-03 12:00:00")
-    def test_creates_position_history_on_expiry(self, system_settings, guard_user):
+    def test_creates_position_history_on_expiry(self, system_settings, guard, feb_exhibition, task_now):
         """Test that PositionHistory is created when swap expires."""
-        guard = Guard.objects.get(user=guard_user)
-        
-        exhibition = Exhibition.objects.create(
-            name='Swap History Test',
-            number_of_positions=1,
-            start_date=timezone.make_aware(datetime(2026, 2, 1)),
-            end_date=timezone.make_aware(datetime(2026, 2, 28)),
-            open_on=[1, 2, 3, 4]
-        )
-        
+        task_now(datetime(2026, 2, 3, 12, 0))
         position = Position.objects.create(
-            exhibition=exhibition,
+            exhibition=feb_exhibition,
             date=date(2026, 2, 3),
             start_time=time(10, 0),
             end_time=time(14, 0)
@@ -946,6 +928,106 @@ class TestExpireSwapRequests:
             action=PositionHistory.Action.CANCELLED
         ).count()
         assert new_history_count > initial_history_count
+    
+    @pytest.mark.parametrize('swap_count', [1, 5])
+    def test_query_count_does_not_grow_with_swaps(
+        self, system_settings, feb_exhibition, task_now, django_assert_num_queries, swap_count
+    ):
+        """Test that expiring more swap requests doesn't add queries (bulk writes)."""
+        task_now(datetime(2026, 2, 3, 12, 0))
+        # One pending swap per guard is allowed - one guard per swap
+        users = [
+            User.objects.create_user(username=f'swap_guard{i}', password='testpass123')
+            for i in range(swap_count)
+        ]
+        positions = Position.objects.bulk_create([
+            Position(exhibition=feb_exhibition, date=date(2026, 2, 3), start_time=time(10, 0), end_time=time(14, 0))
+            for _ in users
+        ])
+        PositionSwapRequest.objects.bulk_create([
+            PositionSwapRequest(
+                position_to_swap=position,
+                requesting_guard=user.guard,
+                status='pending',
+                expires_at=timezone.make_aware(datetime(2026, 2, 3, 11, 0))
+            )
+            for user, position in zip(users, positions)
+        ])
+        
+        # SELECT swaps, SAVEPOINT, SELECT FOR UPDATE, 2 bulk INSERTs, 1 UPDATE, RELEASE
+        with django_assert_num_queries(7):
+            expire_swap_requests()
+        
+        assert PositionSwapRequest.objects.filter(status='expired').count() == swap_count
+    
+    def test_falls_back_to_one_by_one_when_bulk_write_fails(
+        self, system_settings, guard, feb_exhibition, task_now, monkeypatch
+    ):
+        """Test that a failing bulk write still expires requests one by one."""
+        task_now(datetime(2026, 2, 3, 12, 0))
+        position = Position.objects.create(
+            exhibition=feb_exhibition,
+            date=date(2026, 2, 3),
+            start_time=time(10, 0),
+            end_time=time(14, 0)
+        )
+        swap_request = PositionSwapRequest.objects.create(
+            position_to_swap=position,
+            requesting_guard=guard,
+            status='pending',
+            expires_at=timezone.make_aware(datetime(2026, 2, 3, 11, 0))
+        )
+        
+        def failing_bulk_create(*args, **kwargs):
+            raise RuntimeError('bulk insert failed')
+        
+        monkeypatch.setattr(Point.objects, 'bulk_create', failing_bulk_create)
+        
+        result = expire_swap_requests()
+        
+        swap_request.refresh_from_db()
+        assert swap_request.status == 'expired'
+        assert result == "Expired 1 swap requests"
+        assert PositionHistory.objects.filter(
+            position=position,
+            action=PositionHistory.Action.CANCELLED
+        ).count() == 1
+        assert Point.objects.filter(guard=guard, points__lt=0).count() == 1
+    
+    def test_skips_swap_accepted_after_it_was_loaded(
+        self, system_settings, guard, feb_exhibition, task_now, monkeypatch
+    ):
+        """Test that a swap accepted between loading and expiring is neither expired nor penalized."""
+        task_now(datetime(2026, 2, 3, 12, 0))
+        position = Position.objects.create(
+            exhibition=feb_exhibition,
+            date=date(2026, 2, 3),
+            start_time=time(10, 0),
+            end_time=time(14, 0)
+        )
+        swap_request = PositionSwapRequest.objects.create(
+            position_to_swap=position,
+            requesting_guard=guard,
+            status='pending',
+            expires_at=timezone.make_aware(datetime(2026, 2, 3, 11, 0))
+        )
+        
+        # Settings are loaded after the pending swaps - accept the swap at that point
+        get_active = SystemSettings.get_active
+        
+        def accept_then_get_active():
+            PositionSwapRequest.objects.filter(pk=swap_request.pk).update(status='accepted')
+            return get_active()
+        
+        monkeypatch.setattr('background_tasks.tasks.SystemSettings.get_active', accept_then_get_active)
+        
+        result = expire_swap_requests()
+        
+        swap_request.refresh_from_db()
+        assert swap_request.status == 'accepted'
+        assert result == "Expired 0 swap requests"
+        assert not PositionHistory.objects.filter(action=PositionHistory.Action.CANCELLED).exists()
+        assert not Point.objects.filter(guard=guard).exists()
 
 
 # ============================================================================
@@ -957,10 +1039,8 @@ class TestUpdateAllGuardPriorities:
     """Tests for update_all_guard_priorities Celery task."""
     
     @freeze_time("2026-02-09 00:05:00")  # Monday morning
-    def test_updates_priorities_for_all_active_guards(self, system_settings, guard_user):
+    def test_updates_priorities_for_all_active_guards(self, system_settings, guard):
         """Test that priorities are updated for all active guards."""
-        guard = Guard.objects.get(user=guard_user)
-        
         system_settings.next_week_start = date(2026, 2, 9)
         system_settings.next_week_end = date(2026, 2, 15)
         system_settings.save()
@@ -990,7 +1070,7 @@ class TestUpdateAllGuardPriorities:
             password='testpass123'
         )
         inactive_user.is_active = False
-        inactive_user.save()
+        inactive_user.save(update_fields=['is_active'])
         
         system_settings.next_week_start = date(2026, 2, 9)
         system_settings.next_week_end = date(2026, 2, 15)
@@ -1000,6 +1080,23 @@ class TestUpdateAllGuardPriorities:
         result = update_all_guard_priorities()
         
         assert 'Skipped' not in str(result) if result else True
+    
+    @pytest.mark.parametrize('guard_count', [1, 5])
+    @freeze_time("2026-02-09 00:05:00")
+    def test_reads_do_not_grow_with_guards(self, system_settings, django_assert_num_queries, guard_count):
+        """Test that only the priority UPDATE is issued per guard, all reads are shared."""
+        users = [
+            User.objects.create_user(username=f'priority_guard{i}', password='testpass123')
+            for i in range(guard_count)
+        ]
+        Point.objects.bulk_create([
+            Point(guard=user.guard, points=Decimal('10.00'), explanation='Test points')
+            for user in users
+        ])
+        
+        # SELECT guards + SELECT weekly point totals, then one UPDATE per guard
+        with django_assert_num_queries(2 + guard_count):
+            update_all_guard_priorities()
 
 
 # ============================================================================
@@ -1083,7 +1180,7 @@ class TestGetAveragePointsForWeek:
     @freeze_time("2026-02-05 12:00:00")  # Thursday midweek
     def test_calculates_average_from_other_guards(self, system_settings, guard_user, admin_user):
         """Test that average is calculated from all guards except excluded one."""
-        guard1 = Guard.objects.get(user=guard_user)
+        guard1 = guard_user.guard
         
         # Create second guard
         user2 = User.objects.create_user(
@@ -1092,7 +1189,7 @@ class TestGetAveragePointsForWeek:
             password='testpass123',
             role=User.ROLE_GUARD
         )
-        guard2 = Guard.objects.get(user=user2)
+        guard2 = user2.guard
         
         # Week range must include frozen time (2026-02-05)
         week_start = timezone.make_aware(datetime(2026, 2, 2, 0, 0, 0))
@@ -1119,16 +1216,36 @@ class TestGetAveragePointsForWeek:
         assert result == Decimal('20.00')
     
     @freeze_time("2026-02-05 12:00:00")
-    def test_returns_zero_when_no_guards_have_points(self, system_settings, guard_user):
+    def test_returns_zero_when_no_guards_have_points(self, system_settings, guard):
         """Test that 0 is returned when no other guards have points."""
-        guard = Guard.objects.get(user=guard_user)
-        
         week_start = timezone.make_aware(datetime(2026, 2, 2, 0, 0, 0))
         week_end = timezone.make_aware(datetime(2026, 2, 9, 0, 0, 0))
         
         result = get_average_points_for_week(guard, week_start, week_end)
         
         assert result == Decimal('0.0')
+    
+    @freeze_time("2026-02-05 12:00:00")
+    def test_averages_guard_totals_in_one_query(self, system_settings, guard):
+        """Test that average is taken over guards' weekly totals, not single points."""
+        user2 = User.objects.create_user(username='guard2', password='testpass123')
+        user3 = User.objects.create_user(username='guard3', password='testpass123')
+        
+        week_start = timezone.make_aware(datetime(2026, 2, 2, 0, 0, 0))
+        week_end = timezone.make_aware(datetime(2026, 2, 9, 0, 0, 0))
+        
+        # guard2: 10 + 20 = 30, guard3: 30 → average 30 (average of single points would be 20)
+        Point.objects.bulk_create([
+            Point(guard=user2.guard, points=Decimal('10.00'), explanation='Test'),
+            Point(guard=user2.guard, points=Decimal('20.00'), explanation='Test'),
+            Point(guard=user3.guard, points=Decimal('30.00'), explanation='Test'),
+        ])
+        
+        with CaptureQueriesContext(connection) as ctx:
+            result = get_average_points_for_week(guard, week_start, week_end)
+        
+        assert result == Decimal('30.00')
+        assert len(ctx.captured_queries) == 1
 
 
 # ============================================================================
@@ -1140,10 +1257,8 @@ class TestCalculateGuardPriority:
     """Tests for calculate_guard_priority helper function."""
     
     @freeze_time("2026-02-09 00:00:00")  # Monday
-    def test_calculates_weighted_priority_from_points_history(self, system_settings, guard_user):
+    def test_calculates_weighted_priority_from_points_history(self, system_settings, guard):
         """Test that priority is calculated with weighted decay."""
-        guard = Guard.objects.get(user=guard_user)
-        
         system_settings.points_life_weeks = 3
         system_settings.save()
         
@@ -1157,13 +1272,32 @@ class TestCalculateGuardPriority:
         )
         # Explicitly set date_awarded AFTER creation
         point.date_awarded = timezone.make_aware(datetime(2026, 2, 5, 12, 0, 0))
-        point.save()
+        point.save(update_fields=['date_awarded'])
         
         result = calculate_guard_priority(guard, cycle_start, 3)
         
         # Should have at least some priority from that one point
         assert result > Decimal('5.0')
     
+    @freeze_time("2026-02-09 00:00:00")
+    def test_precomputed_point_totals_give_same_priority_without_queries(self, system_settings, guard):
+        """Test that shared point totals (as in update_all_guard_priorities) replace per-week queries."""
+        cycle_start = timezone.now()
+        
+        point = Point.objects.create(guard=guard, points=Decimal('10.00'), explanation='Last week')
+        Point.objects.filter(id=point.id).update(
+            date_awarded=timezone.make_aware(datetime(2026, 2, 5, 12, 0, 0))
+        )
+        
+        point_totals = get_weekly_point_totals(cycle_start, 3)
+        assert point_totals == {guard.id: {0: Decimal('10.00')}}
+        
+        with CaptureQueriesContext(connection) as ctx:
+            result = calculate_guard_priority(guard, cycle_start, 3, point_totals)
+        
+        assert result == calculate_guard_priority(guard, cycle_start, 3)
+        assert len(ctx.captured_queries) == 0
+    
     @freeze_time("2026-02-09 00:00:00")
     def test_uses_average_for_weeks_before_guard_existed(self, system_settings, guard_user, admin_user):
         """Test that average is used for weeks when guard didn't exist yet."""
@@ -1192,7 +1326,7 @@ class TestCalculateGuardPriority:
                 password='testpass123',
                 role=User.ROLE_GUARD
             )
-            new_guard = Guard.objects.get(user=new_user)
+            new_guard = Guard.objects.select_related('user').get(user=new_user)
         
         system_settings.points_life_weeks = 2
         system_settings.save()
@@ -84,9 +84,7 @@ class TestCreateGuardProfileSignal:
             password='test123',
             role=User.ROLE_GUARD
         )
-        guard1 = Guard.objects.get(user=user1)
-        guard1.priority_number = Decimal('10.0')
-        guard1.save()
+        Guard.objects.filter(user=user1).update(priority_number=Decimal('10.0'))
         
         # Create second guard - should get average
         user2 = User.objects.create_user(
@@ -195,7 +193,7 @@ class TestGeneratePositionsOnExhibitionCreateSignal:
         
         # Signal should have created positions
         positions = Position.objects.filter(exhibition=exhibition)
-        assert positions.count() > 0
+        assert positions.exists()
     
     def test_positions_not_created_for_future_exhibition(self, system_settings):
         """Test that positions are NOT created for exhibitions far in future."""
@@ -212,7 +210,7 @@ class TestGeneratePositionsOnExhibitionCreateSignal:
         
         # No positions should be created (outside this_week/next_week)
         positions = Position.objects.filter(exhibition=exhibition)
-        assert positions.count() == 0
+        assert not positions.exists()
     
     def test_special_event_creates_positions_with_custom_times(self, system_settings):
         """Test that special events create positions with custom start/end times."""
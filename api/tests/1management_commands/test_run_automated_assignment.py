@@ -16,9 +16,7 @@ class TestRunAutomatedAssignmentCommand:
         """Test assignment with --force flag (skip confirmation)."""
         # Setup
         exhibition = sample_exhibition
-        guard = Guard.objects.get(user=guard_user)
-        guard.availability = 5
-        guard.save()
+        Guard.objects.filter(user=guard_user).update(availability=5)
         
         # Generate positions
         call_command('generate_positions', stdout=StringIO())
@@ -40,9 +38,7 @@ class TestRunAutomatedAssignmentCommand:
         """Test assignment with user confirmation."""
         # Setup
         exhibition = sample_exhibition
-        guard = Guard.objects.get(user=guard_user)
-        guard.availability = 3
-        guard.save()
+        Guard.objects.filter(user=guard_user).update(availability=3)
         
         # Generate positions
         call_command('generate_positions', stdout=StringIO())
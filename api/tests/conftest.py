@@ -38,6 +38,38 @@ def use_real_smtp_backend(settings):
     """
     settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
+
+# ============= PASSWORD HASHING =============
+@pytest.fixture(autouse=True, scope='session')
+def fast_password_hasher():
+    """
+    Use MD5 password hasher for all tests.
+    Default hasher is deliberately slow and dominates User creation time in tests.
+    """
+    from django.test.utils import override_settings
+    with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+        yield
+
+
+# ============= TEST DATABASE =============
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    """
+    Disable synchronous commit on the test database.
+
+    Test data is throwaway, so COMMITs (transactional tests, fixture setup)
+    don't need to wait for WAL flush to disk. Set on database level so it
+    applies to every new connection to the test database.
+    """
+    from django.db import connection
+    with django_db_blocker.unblock():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'ALTER DATABASE "{connection.settings_dict["NAME"]}" SET synchronous_commit TO OFF'
+            )
+            cursor.execute('SET synchronous_commit TO OFF')
+
+
 User = get_user_model()
 
 
@@ -3,64 +3,312 @@ Preference scoring utilities for assignment algorithm.
 
 Calculates exhibition and day preference scores (0-2 range, sum = n).
 """
+import numpy as np
 from decimal import Decimal
 
 
-def calculate_exhibition_preference_score(guard, exhibition, next_week_start):
+def prefetch_preferences(guards, next_week_start):
     """
-    Calculate exhibition preference score for guard-exhibition pair.
+    Prefetch exhibition and day preferences for many guards (2 queries total).
     
-    Logic:
-    - If no preference set: return 1.0 (neutral)
-    - If preference set: linear mapping rank 1→2.0, rank n→0.0
-    - Formula: 2.0 * (n - rank) / (n - 1)
+    Only preferences that can apply to next_week are loaded (week-specific
+    for next_week_start or template). Stored on each guard as
+    _cached_exhibition_prefs / _cached_day_prefs (to_attr), which
+    get_exhibition_preference / get_day_preference use instead of querying.
     
     Args:
-        guard: Guard instance
-        exhibition: Exhibition instance
-        next_week_start: Date of next week start (for filtering preferences)
+        guards: List of Guard instances
+        next_week_start: Date of next week start
+    """
+    from django.db.models import Prefetch, Q, prefetch_related_objects
+    from api.api_models.preferences import GuardExhibitionPreference, GuardDayPreference
+    
+    # Drop results of earlier prefetch - prefetch_related_objects skips guards
+    # that already have to_attr set, and preferences may have changed since
+    for guard in guards:
+        for attr in ('_cached_exhibition_prefs', '_cached_day_prefs', '_cached_prefs_week'):
+            guard.__dict__.pop(attr, None)
+    
+    applicable = Q(next_week_start=next_week_start) | Q(is_template=True)
+    prefetch_related_objects(
+        guards,
+        Prefetch(
+            'exhibition_preferences',
+            queryset=GuardExhibitionPreference.objects.filter(applicable),
+            to_attr='_cached_exhibition_prefs'
+        ),
+        Prefetch(
+            'day_preferences',
+            queryset=GuardDayPreference.objects.filter(applicable),
+            to_attr='_cached_day_prefs'
+        ),
+    )
+    for guard in guards:
+        guard._cached_prefs_week = next_week_start
+
+
+def _pick_cached_preference(cached, next_week_start):
+    """Week-specific preference from prefetched list, else template (newest first)."""
+    for preference in cached:
+        if preference.next_week_start == next_week_start:
+            return preference
+    for preference in cached:
+        if preference.is_template:
+            return preference
+    return None
+
+
+def get_exhibition_preference(guard, next_week_start):
+    """
+    Get exhibition preference that applies to guard for next_week.
+    
+    Week-specific preference has precedence, otherwise template is used.
+    Uses preferences prefetched by prefetch_preferences when available.
     
     Returns:
-        float: Score in range 0-2 (1.0 = neutral)
+        GuardExhibitionPreference or None
     """
+    if '_cached_prefs_week' in guard.__dict__ and guard._cached_prefs_week == next_week_start:
+        # Prefetched by prefetch_preferences
+        return _pick_cached_preference(guard._cached_exhibition_prefs, next_week_start)
+    
     from api.api_models.preferences import GuardExhibitionPreference
     
+    guard_id = guard.pk
+    
     # Get preference for this guard and next_week
     preference = GuardExhibitionPreference.objects.filter(
-        guard=guard,
+        guard_id=guard_id,
         next_week_start=next_week_start
     ).first()
     
     if not preference:
         # Check for template
         preference = GuardExhibitionPreference.objects.filter(
-            guard=guard,
+            guard_id=guard_id,
             is_template=True
         ).first()
     
-    if not preference or not preference.exhibition_order:
-        # No preference set - neutral score
-        return 1.0
+    return preference
+
+
+def get_day_preference(guard, next_week_start):
+    """
+    Get day preference that applies to guard for next_week.
     
-    # Find exhibition rank in preference order
-    try:
-        rank = preference.exhibition_order.index(exhibition.id) + 1  # 1-indexed
-    except ValueError:
-        # Exhibition not in preference list (shouldn't happen after validation)
-        return 1.0
+    Week-specific preference has precedence, otherwise template is used.
+    Uses preferences prefetched by prefetch_preferences when available.
+    
+    Returns:
+        GuardDayPreference or None
+    """
+    if '_cached_prefs_week' in guard.__dict__ and guard._cached_prefs_week == next_week_start:
+        # Prefetched by prefetch_preferences
+        return _pick_cached_preference(guard._cached_day_prefs, next_week_start)
+    
+    from api.api_models.preferences import GuardDayPreference
+    
+    guard_id = guard.pk
+    
+    # Get preference for this guard and next_week
+    preference = GuardDayPreference.objects.filter(
+        guard_id=guard_id,
+        next_week_start=next_week_start
+    ).first()
+    
+    if not preference:
+        # Check for template
+        preference = GuardDayPreference.objects.filter(
+            guard_id=guard_id,
+            is_template=True
+        ).first()
+    
+    return preference
+
+
+def get_exhibition_order(guard, next_week_start):
+    """
+    Get exhibition_order that applies to guard for next_week.
     
-    n = len(preference.exhibition_order)
+    Same lookup as get_exhibition_preference, but only the order column is
+    fetched (no model instance is built).
+    
+    Returns:
+        list of exhibition ids or None
+    """
+    if '_cached_prefs_week' in guard.__dict__ and guard._cached_prefs_week == next_week_start:
+        # Prefetched by prefetch_preferences
+        preference = _pick_cached_preference(guard._cached_exhibition_prefs, next_week_start)
+        return preference.exhibition_order if preference else None
+    
+    from api.api_models.preferences import GuardExhibitionPreference
+    
+    guard_id = guard.pk
+    
+    # Get preference for this guard and next_week
+    order = GuardExhibitionPreference.objects.filter(
+        guard_id=guard_id,
+        next_week_start=next_week_start
+    ).values_list('exhibition_order', flat=True).first()
+    
+    if order is None:
+        # Check for template
+        order = GuardExhibitionPreference.objects.filter(
+            guard_id=guard_id,
+            is_template=True
+        ).values_list('exhibition_order', flat=True).first()
+    
+    return order
+
+
+def get_day_order(guard, next_week_start):
+    """
+    Get day_order that applies to guard for next_week.
+    
+    Same lookup as get_day_preference, but only the order column is
+    fetched (no model instance is built).
+    
+    Returns:
+        list of days (0-6) or None
+    """
+    if '_cached_prefs_week' in guard.__dict__ and guard._cached_prefs_week == next_week_start:
+        # Prefetched by prefetch_preferences
+        preference = _pick_cached_preference(guard._cached_day_prefs, next_week_start)
+        return preference.day_order if preference else None
+    
+    from api.api_models.preferences import GuardDayPreference
+    
+    guard_id = guard.pk
+    
+    # Get preference for this guard and next_week
+    order = GuardDayPreference.objects.filter(
+        guard_id=guard_id,
+        next_week_start=next_week_start
+    ).values_list('day_order', flat=True).first()
+    
+    if order is None:
+        # Check for template
+        order = GuardDayPreference.objects.filter(
+            guard_id=guard_id,
+            is_template=True
+        ).values_list('day_order', flat=True).first()
+    
+    return order
+
+
+def build_rank_map(order):
+    """
+    Map each item of preference order to its 0-indexed rank.
+    
+    A repeated id keeps the rank of its first occurrence (as order.index).
+    
+    Args:
+        order: List of ranked ids (first = most preferred) or None
+    
+    Returns:
+        dict {item: rank} (empty if no order set)
+    """
+    rank_map = {}
+    for rank, item in enumerate(order or ()):
+        rank_map.setdefault(item, rank)
+    return rank_map
+
+
+def get_rank_map(preference, order_field):
+    """
+    Rank map of preference order, built once and cached on the preference.
+    
+    Args:
+        preference: GuardExhibitionPreference or GuardDayPreference
+        order_field: 'exhibition_order' or 'day_order'
+    
+    Returns:
+        dict {item: rank}
+    """
+    rank_map = getattr(preference, '_rank_map', None)
+    if rank_map is None:
+        rank_map = build_rank_map(getattr(preference, order_field))
+        preference._rank_map = rank_map
+    return rank_map
+
+
+def rank_map_score(rank_map, item, n):
+    """
+    Score item by its rank in preference rank map (see preference_rank_score).
+    
+    Args:
+        rank_map: dict {item: 0-indexed rank} from build_rank_map
+        item: Exhibition id or day of week
+        n: Length of preference order (repeated ids counted, as in
+            calculate_preference_score_table)
+    
+    Returns:
+        float: Score in range 0-2 (1.0 = neutral)
+    """
+    rank = rank_map.get(item)
+    if rank is None:
+        # No preference set, or item not in preference list
+        # (shouldn't happen after validation) - neutral score
+        return 1.0
     
     if n == 1:
-        return 1.0  # Special case: only one exhibition
+        return 1.0  # Special case: only one item
     
     # Linear mapping: rank 1 → 2.0, rank n → 0.0
-    score = 2.0 * (n - rank) / (n - 1)
+    return 2.0 * (n - 1 - rank) / (n - 1)
+
+
+def preference_rank_score(order, item):
+    """
+    Score item by its rank in preference order.
+    
+    Logic:
+    - If no order set: return 1.0 (neutral)
+    - If item not in order or order has one item: return 1.0 (neutral)
+    - Otherwise linear mapping rank 1→2.0, rank n→0.0
+    - Formula: 2.0 * (n - rank) / (n - 1)
     
-    return score
+    Args:
+        order: List of ranked ids (first = most preferred) or None
+        item: Exhibition id or day of week
+    
+    Returns:
+        float: Score in range 0-2 (1.0 = neutral)
+    """
+    return rank_map_score(build_rank_map(order), item, len(order or ()))
 
 
-def calculate_day_preference_score(guard, day_of_week, next_week_start):
+def calculate_exhibition_preference_score(guard, exhibition, next_week_start, *, preference=None):
+    """
+    Calculate exhibition preference score for guard-exhibition pair.
+    
+    Logic:
+    - If no preference set: return 1.0 (neutral)
+    - If preference set: linear mapping rank 1→2.0, rank n→0.0
+    - Formula: 2.0 * (n - rank) / (n - 1)
+    
+    Args:
+        guard: Guard instance
+        exhibition: Exhibition instance
+        next_week_start: Date of next week start (for filtering preferences)
+        preference: Already fetched GuardExhibitionPreference (skips the query
+            when scoring several exhibitions for the same guard)
+    
+    Returns:
+        float: Score in range 0-2 (1.0 = neutral)
+    """
+    if preference is None:
+        return preference_rank_score(get_exhibition_order(guard, next_week_start), exhibition.id)
+    
+    # Rank lookup is O(1) - rank map is cached on the preference
+    return rank_map_score(
+        get_rank_map(preference, 'exhibition_order'),
+        exhibition.id,
+        len(preference.exhibition_order or ())
+    )
+
+
+def calculate_day_preference_score(guard, day_of_week, next_week_start, *, preference=None):
     """
     Calculate day preference score for guard-day pair.
     
@@ -73,42 +321,113 @@ def calculate_day_preference_score(guard, day_of_week, next_week_start):
         guard: Guard instance
         day_of_week: Integer 0-6 (0=Monday, 6=Sunday)
         next_week_start: Date of next week start (for filtering preferences)
+        preference: Already fetched GuardDayPreference (skips the query
+            when scoring several days for the same guard)
     
     Returns:
         float: Score in range 0-2 (1.0 = neutral)
     """
-    from api.api_models.preferences import GuardDayPreference
+    if preference is None:
+        return preference_rank_score(get_day_order(guard, next_week_start), day_of_week)
     
-    # Get preference for this guard and next_week
-    preference = GuardDayPreference.objects.filter(
-        guard=guard,
-        next_week_start=next_week_start
-    ).first()
+    # Rank lookup is O(1) - rank map is cached on the preference
+    return rank_map_score(
+        get_rank_map(preference, 'day_order'),
+        day_of_week,
+        len(preference.day_order or ())
+    )
+
+
+def build_padded_orders(orders, width=None):
+    """
+    Stack preference orders into int numpy array padded with -1.
     
-    if not preference:
-        # Check for template
-        preference = GuardDayPreference.objects.filter(
-            guard=guard,
-            is_template=True
-        ).first()
+    Args:
+        orders: List of preference orders (list of ids) or None per guard
+        width: Number of columns (default: longest order)
     
-    if not preference or not preference.day_order:
-        # No preference set - neutral score
-        return 1.0
+    Returns:
+        int numpy array (len(orders), width) - row of all -1 = no preference
+    """
+    if width is None:
+        width = max((len(order) for order in orders if order), default=0)
     
-    # Find day rank in preference order
-    try:
-        rank = preference.day_order.index(day_of_week) + 1  # 1-indexed
-    except ValueError:
-        # Day not in preference list (shouldn't happen after validation)
-        return 1.0
+    padded = np.full((len(orders), width), -1, dtype=np.int64)
+    for i, order in enumerate(orders):
+        if order:
+            padded[i, :len(order)] = order
+    return padded
+
+
+def calculate_preference_score_table(orders, items):
+    """
+    Vectorized preference scores of many items for many guards at once.
     
-    n = len(preference.day_order)
+    Same logic as preference_rank_score, applied to every (guard, item) cell:
+    no preference, item not ranked or only one item ranked → 1.0,
+    otherwise 2.0 * (n - rank) / (n - 1).
     
-    if n == 1:
-        return 1.0  # Special case: only one day
+    Args:
+        orders: int numpy array (n_guards, width) from build_padded_orders
+        items: Sequence of unique exhibition ids or days of week (table columns)
     
-    # Linear mapping: rank 1 → 2.0, rank n → 0.0
-    score = 2.0 * (n - rank) / (n - 1)
+    Returns:
+        numpy array (n_guards, len(items)): Scores in range 0-2 (1.0 = neutral)
+    """
+    items = np.asarray(items, dtype=orders.dtype)
+    scores = np.ones((len(orders), len(items)))
+    width = orders.shape[1]
+    if width == 0 or len(items) == 0:
+        return scores
     
-    return score
+    # Map every ranked id to its item column (-1 if it is not one of the items)
+    item_order = np.argsort(items, kind='stable')
+    sorted_items = items[item_order]
+    found = np.minimum(np.searchsorted(sorted_items, orders), len(items) - 1)
+    in_items = (orders >= 0) & (sorted_items[found] == orders)
+    
+    # Rank lookup table (guards, items): scatter each guard's ranks once instead of
+    # comparing every item with every rank. minimum keeps the first rank of a repeated id.
+    rank_table = np.full((len(orders), len(items)), width)
+    guard_rows, rank_cols = np.nonzero(in_items)
+    np.minimum.at(rank_table, (guard_rows, item_order[found[guard_rows, rank_cols]]), rank_cols)
+    
+    ranked = rank_table < width
+    n = np.broadcast_to((orders >= 0).sum(axis=1)[:, None], ranked.shape)
+    
+    scorable = ranked & (n > 1)
+    scores[scorable] = 2.0 * (n[scorable] - 1 - rank_table[scorable]) / (n[scorable] - 1)
+    return scores
+
+
+def calculate_preference_scores_bulk(orders, item):
+    """
+    Vectorized preference score of one item for many guards at once.
+    
+    Single column of calculate_preference_score_table.
+    
+    Args:
+        orders: int numpy array (n_guards, width) from build_padded_orders
+        item: Exhibition id or day of week
+    
+    Returns:
+        numpy array (n_guards,): Scores in range 0-2 (1.0 = neutral)
+    """
+    return calculate_preference_score_table(orders, [item])[:, 0]
+
+
+def calculate_day_preference_scores_bulk(day_orders, day_of_week):
+    """
+    Vectorized day preference score for many guards at once.
+    
+    Same logic as calculate_day_preference_score, see calculate_preference_scores_bulk.
+    
+    Args:
+        day_orders: int numpy array (n_guards, 7) - each row is guard's day_order
+            padded with -1 (row of all -1 = no preference)
+        day_of_week: Integer 0-6 (0=Monday, 6=Sunday)
+    
+    Returns:
+        numpy array (n_guards,): Scores in range 0-2 (1.0 = neutral)
+    """
+    return calculate_preference_scores_bulk(day_orders, day_of_week)
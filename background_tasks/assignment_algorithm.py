@@ -37,6 +37,32 @@ def positions_overlap(pos1, pos2):
     return pos1.start_time < pos2.end_time and pos2.start_time < pos1.end_time
 
 
+def _pack_time_key(day, t):
+    """
+    Pack date and time of day into a single integer.
+    
+    Layout: (date ordinal << 17) | seconds since midnight (86400 < 2^17).
+    Keys of different days never interleave, so two positions overlap iff
+    start1 < end2 AND start2 < end1 on their keys - same-date check is implicit.
+    """
+    return (day.toordinal() << 17) | (t.hour * 3600 + t.minute * 60 + t.second)
+
+
+def position_time_keys(positions):
+    """
+    Packed (start, end) integer keys for a list of positions.
+    
+    Args:
+        positions: List of Position instances
+    
+    Returns:
+        tuple: (start_keys, end_keys) - lists of ints aligned with positions
+    """
+    start_keys = [_pack_time_key(p.date, p.start_time) for p in positions]
+    end_keys = [_pack_time_key(p.date, p.end_time) for p in positions]
+    return start_keys, end_keys
+
+
 def build_overlap_groups(positions):
     """
     Group positions that overlap in time.
@@ -52,16 +78,54 @@ def build_overlap_groups(positions):
     """
     n = len(positions)
     overlap_map = defaultdict(set)
+    start_keys, end_keys = position_time_keys(positions)
     
     for i in range(n):
+        start_i = start_keys[i]
+        end_i = end_keys[i]
         for j in range(i + 1, n):
-            if positions_overlap(positions[i], positions[j]):
+            if start_i < end_keys[j] and start_keys[j] < end_i:
                 overlap_map[i].add(j)
                 overlap_map[j].add(i)
     
     return overlap_map
 
 
+def _build_score_kernel(priority_norm, exhibition_table, day_table, exhibition_idx, day_idx,
+                        valid_mask, slots_per_guard):
+    """
+    Score matrix from per-guard lookup tables, without Python-level loops.
+    
+    Weighted sum: 60% priority, 20% exhibition, 20% day.
+    Preference scores (0-2) are normalized to 0-1 before weighting.
+    Weights are applied to the small per-guard tables before they are
+    gathered to positions, then the (n_guards, n_positions) sum is built
+    in place and each guard row is duplicated per slot.
+    
+    Args:
+        priority_norm: numpy array (n_guards,) of min-max normalized priorities
+        exhibition_table: numpy array (n_guards, n_exhibitions), values 0-2
+        day_table: numpy array (n_guards, 7), values 0-2
+        exhibition_idx: int numpy array (n_positions,) - exhibition column of each position
+        day_idx: int numpy array (n_positions,) - weekday of each position
+        valid_mask: bool numpy array (n_guards, n_positions), False = guard cannot work position
+        slots_per_guard: int numpy array (n_guards,) of row counts per guard
+    
+    Returns:
+        float32 numpy array (sum(slots_per_guard), n_positions) with -9999 for invalid pairs
+        (scores are 0-1, single precision halves the tiled matrix size)
+    """
+    priority_part = np.float32(0.6) * priority_norm.astype(np.float32)
+    exhibition_part = np.float32(0.1) * exhibition_table.astype(np.float32)
+    day_part = np.float32(0.1) * day_table.astype(np.float32)
+    
+    scores = np.take(exhibition_part, exhibition_idx, axis=1)
+    scores += priority_part[:, None]
+    scores += np.take(day_part, day_idx, axis=1)
+    scores[~valid_mask] = -9999
+    return np.repeat(scores, slots_per_guard, axis=0)
+
+
 def build_score_matrix(guards, positions, settings, availability_caps):
     """
     Build score matrix for Hungarian algorithm with guard duplication.
@@ -88,28 +152,27 @@ def build_score_matrix(guards, positions, settings, availability_caps):
         - guard_positions_map: dict {guard_id: [position_ids]}
     """
     from api.utils.preference_scoring import (
-        calculate_exhibition_preference_score,
-        calculate_day_preference_score
+        get_exhibition_order,
+        get_day_order,
+        prefetch_preferences,
+        build_padded_orders,
+        calculate_preference_score_table
     )
     from api.utils.guard_periods import get_guard_work_periods, get_positions_for_guard
     
     n_positions = len(positions)
     
     # Calculate total slots (sum of all availabilities, respecting caps)
-    total_slots = sum(
-        availability_caps.get(g.id, g.availability) 
-        for g in guards
+    slots_per_guard = np.fromiter(
+        (availability_caps.get(g.id, g.availability) for g in guards), dtype=np.int32, count=len(guards)
     )
+    total_slots = int(slots_per_guard.sum())
     
     logger.info(
         f"Building score matrix: {len(guards)} guards with {total_slots} total slots "
         f"x {n_positions} positions"
     )
     
-    # Initialize matrix and row mapping
-    score_matrix = np.zeros((total_slots, n_positions))
-    row_to_guard_map = []  # Maps row index → Guard instance
-    
     # Pre-calculate guard work periods and valid positions
     guard_work_periods_map = {}
     guard_positions_map = {}
@@ -131,74 +194,72 @@ def build_score_matrix(guards, positions, settings, availability_caps):
         )
     
     # Min-max normalize priorities to 0-1 range
-    priorities = [g.priority_number for g in guards]
-    min_priority = min(priorities)
-    max_priority = max(priorities)
+    priority_values = np.array([float(g.priority_number) for g in guards])
+    min_priority = priority_values.min()
+    max_priority = priority_values.max()
     priority_range = max_priority - min_priority
     
     if priority_range == 0:
         # All guards have same priority - set all to 0.5
         logger.info("All guards have same priority - using 0.5 for all")
-        priority_normalized = {g.id: 0.5 for g in guards}
+        priority_array = np.full(len(guards), 0.5)
     else:
         # Min-max normalization: (value - min) / (max - min)
-        priority_normalized = {
-            g.id: float((g.priority_number - min_priority) / priority_range)
-            for g in guards
-        }
+        priority_array = (priority_values - min_priority) / priority_range
     
     logger.info(
         f"Priority range: [{min_priority:.2f}, {max_priority:.2f}], "
         f"normalized to [0.0, 1.0]"
     )
     
+    # Index arrays: position → exhibition column, position → weekday
+    exhibition_columns = {}  # {exhibition_id: column in exhibition score table}
+    for position in positions:
+        exhibition_columns.setdefault(position.exhibition_id, len(exhibition_columns))
+    
+    exhibition_idx = np.fromiter(
+        (exhibition_columns[p.exhibition_id] for p in positions), dtype=np.int32, count=n_positions
+    )
+    day_idx = np.fromiter((p.date.weekday() for p in positions), dtype=np.int32, count=n_positions)
+    position_columns = {p.id: col for col, p in enumerate(positions)}
+    week_days = sorted(set(day_idx.tolist()))
+    
+    # Preference scores are computed once per (guard, exhibition) and (guard, weekday),
+    # not per (guard, position) - gathered to positions in _build_score_kernel
+    n_guards = len(guards)
+    day_score_table = np.ones((n_guards, 7))
+    valid_mask = np.zeros((n_guards, n_positions), dtype=bool)
+    exhibition_orders = []
+    day_orders = []
+    
+    # Load preferences of all guards in 2 queries instead of 2-4 per guard
+    prefetch_preferences(guards, settings.next_week_start)
+    
+    for i, guard in enumerate(guards):
+        # Guard cannot work positions outside their work periods
+        valid_mask[i, [position_columns[pid] for pid in guard_positions_map[guard.id]]] = True
+        
+        # Fetch guard's preferences once
+        exhibition_orders.append(get_exhibition_order(guard, settings.next_week_start))
+        day_orders.append(get_day_order(guard, settings.next_week_start))
+    
+    # Score all (guard, exhibition) and (guard, weekday) cells at once
+    exhibition_orders = build_padded_orders(exhibition_orders)
+    exhibition_score_table = calculate_preference_score_table(exhibition_orders, list(exhibition_columns))
+    
+    day_orders = build_padded_orders(day_orders, width=7)
+    day_score_table[:, week_days] = calculate_preference_score_table(day_orders, week_days)
+    
     # Build matrix: duplicate each guard according to capped availability
     # Each slot of the guard can potentially work ANY valid position
-    current_row = 0
-    for guard in guards:
-        guard_availability = availability_caps.get(guard.id, guard.availability)
-        priority_norm = priority_normalized[guard.id]
-        valid_position_ids = guard_positions_map[guard.id]
-        
-        # Create N rows for this guard (N = capped availability from caps dict)
-        for slot in range(guard_availability):
-            row_to_guard_map.append(guard)
-            
-            for j, position in enumerate(positions):
-                if position.id not in valid_position_ids:
-                    # Guard cannot work this position (not in their work periods)
-                    score_matrix[current_row, j] = -9999
-                    continue
-                
-                # Calculate components
-                # 1. Priority (min-max normalized → 0-1)
-                
-                # 2. Exhibition preference (0-2 → 0-1)
-                exhibition_score = calculate_exhibition_preference_score(
-                    guard,
-                    position.exhibition,
-                    settings.next_week_start
-                )
-                exhibition_norm = exhibition_score / 2.0
-                
-                # 3. Day preference (0-2 → 0-1)
-                day_score = calculate_day_preference_score(
-                    guard,
-                    position.date.weekday(),
-                    settings.next_week_start
-                )
-                day_norm = day_score / 2.0
-                
-                # Weighted sum: 60% priority, 20% exhibition, 20% day
-                final_score = (
-                    0.6 * priority_norm +
-                    0.2 * exhibition_norm +
-                    0.2 * day_norm
-                )
-                
-                score_matrix[current_row, j] = final_score
-            
-            current_row += 1
+    score_matrix = _build_score_kernel(
+        priority_array, exhibition_score_table, day_score_table,
+        exhibition_idx, day_idx, valid_mask, slots_per_guard
+    )
+    # Maps row index → Guard instance
+    row_to_guard_map = [
+        guard for guard, slots in zip(guards, slots_per_guard.tolist()) for _ in range(slots)
+    ]
     
     logger.info(f"Score matrix built: {total_slots} slots x {n_positions} positions")
     
@@ -254,6 +315,160 @@ def filter_overlapping_assignments(assignments, positions):
     return valid_assignments, freed_position_indices
 
 
+# Above this share of valid pairs Hungarian on the dense matrix is faster,
+# below it the sparse full bipartite matching wins
+SPARSE_LAP_MAX_DENSITY = 0.05
+
+
+def solve_lap(score_matrix):
+    """
+    Maximize total score of one assignment problem, choosing solver by density.
+    
+    Sparse matrices (few valid pairs) are solved with
+    min_weight_full_bipartite_matching over valid pairs only. Dense matrices,
+    and sparse ones where valid pairs can't match every row/position of the
+    smaller side, use linear_sum_assignment.
+    
+    Args:
+        score_matrix: numpy array (n_rows, n_positions), -9999 = invalid pair
+    
+    Returns:
+        tuple: (row_indices, position_indices) sorted by row
+    """
+    valid = score_matrix != -9999
+    density = np.count_nonzero(valid) / valid.size if valid.size else 1.0
+    
+    if density <= SPARSE_LAP_MAX_DENSITY:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+        
+        rows, positions = np.nonzero(valid)
+        scores = score_matrix[rows, positions].astype(np.float64)
+        # Matching size is fixed, so max score = min (top - score); costs stay
+        # positive so no valid pair is dropped as an implicit zero
+        costs = scores.max() + 1.0 - scores
+        try:
+            row_indices, position_indices = min_weight_full_bipartite_matching(
+                csr_matrix((costs, (rows, positions)), shape=score_matrix.shape)
+            )
+        except ValueError:
+            logger.debug("No full matching over valid pairs - using dense solver")
+        else:
+            order = np.argsort(row_indices)
+            return row_indices[order], position_indices[order]
+    
+    return linear_sum_assignment(score_matrix, maximize=True)
+
+
+def solve_assignment(score_matrix):
+    """
+    Maximize total score with Hungarian algorithm, one connected component at a time.
+    
+    Rows and positions are linked only by valid pairs (score != -9999). Groups
+    that share no valid pair are independent, so each connected component is
+    solved on its own sub-matrix - Hungarian is O(n³), so k similar components
+    cost ~k² less than one big matrix. Rows/positions without any valid pair
+    are left out. Each component is solved with solve_lap.
+    
+    Args:
+        score_matrix: numpy array (n_rows, n_positions) from build_score_matrix
+    
+    Returns:
+        tuple: (row_indices, position_indices) sorted by row, like linear_sum_assignment
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    
+    n_rows, n_positions = score_matrix.shape
+    valid_rows, valid_positions = np.nonzero(score_matrix != -9999)
+    
+    # Bipartite graph: nodes 0..n_rows-1 are rows, n_rows.. are positions
+    n_nodes = n_rows + n_positions
+    graph = coo_matrix(
+        (np.ones(len(valid_rows), dtype=np.int8), (valid_rows, n_rows + valid_positions)),
+        shape=(n_nodes, n_nodes)
+    )
+    _, labels = connected_components(graph, directed=False)
+    row_labels = labels[:n_rows]
+    position_labels = labels[n_rows:]
+    
+    components = np.unique(row_labels[valid_rows])
+    if len(components) == 1 and (labels == components[0]).all():
+        # Dense case - one component spans the whole matrix, solve it in place
+        return solve_lap(score_matrix)
+    
+    row_indices = []
+    position_indices = []
+    for component in components:
+        component_rows = np.flatnonzero(row_labels == component)
+        component_positions = np.flatnonzero(position_labels == component)
+        sub_rows, sub_positions = solve_lap(
+            score_matrix[np.ix_(component_rows, component_positions)]
+        )
+        row_indices.append(component_rows[sub_rows])
+        position_indices.append(component_positions[sub_positions])
+    
+    if not row_indices:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    
+    row_indices = np.concatenate(row_indices)
+    position_indices = np.concatenate(position_indices)
+    order = np.argsort(row_indices)
+    return row_indices[order], position_indices[order]
+
+
+def solve_transportation(score_matrix, guard_rows):
+    """
+    Maximize total score as a transportation LP instead of Hungarian on duplicated rows.
+    
+    One variable per valid (guard, position) pair, 0 <= x <= 1. Guard supply is
+    the number of guard's slot rows, position demand is 1. The constraint matrix
+    is totally unimodular, so the simplex vertex solution is integral. Every
+    pair also gets +9999 - same as the -9999 penalty in Hungarian: as many valid
+    pairs as possible first, then the highest total score.
+    
+    Args:
+        score_matrix: numpy array (n_rows, n_positions) from build_score_matrix
+        guard_rows: dict {guard_id: [row indices]} - consecutive rows of each guard
+    
+    Returns:
+        tuple: (row_indices, position_indices) sorted by row - guard's k-th
+        position is reported on guard's k-th row
+    """
+    from scipy.optimize import linprog
+    from scipy.sparse import csr_matrix
+    
+    first_rows = np.array([rows[0] for rows in guard_rows.values()])
+    capacities = np.array([len(rows) for rows in guard_rows.values()])
+    guard_scores = score_matrix[first_rows]
+    n_guards, n_positions = guard_scores.shape
+    
+    guard_idx, position_idx = np.nonzero(guard_scores != -9999)  # Sorted by guard
+    n_pairs = len(guard_idx)
+    if n_pairs == 0:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    
+    # Rows 0..n_guards-1: guard supply, then one row per position demand
+    pairs = np.arange(n_pairs)
+    constraints = csr_matrix(
+        (np.ones(2 * n_pairs), (np.concatenate([guard_idx, n_guards + position_idx]), np.concatenate([pairs, pairs]))),
+        shape=(n_guards + n_positions, n_pairs)
+    )
+    limits = np.concatenate([capacities, np.ones(n_positions)])
+    costs = -(guard_scores[guard_idx, position_idx].astype(np.float64) + 9999)
+    
+    result = linprog(costs, A_ub=constraints, b_ub=limits, bounds=(0, 1), method='highs-ds')
+    if not result.success:
+        logger.warning(f"Transportation LP failed ({result.message}) - using Hungarian")
+        return solve_assignment(score_matrix)
+    
+    chosen = result.x > 0.5
+    chosen_guards = guard_idx[chosen]
+    # k-th chosen position of a guard goes to guard's k-th slot row
+    slot_offsets = np.arange(len(chosen_guards)) - np.searchsorted(chosen_guards, chosen_guards)
+    return first_rows[chosen_guards] + slot_offsets, position_idx[chosen]
+
+
 def assign_positions_automatically(settings, availability_caps=None):
     """
     Main automated assignment function using Hungarian algorithm.
@@ -263,7 +478,8 @@ def assign_positions_automatically(settings, availability_caps=None):
     2. Apply availability caps if provided (demand > supply)
     3. Get all positions for next_week
     4. Build score matrix
-    5. Run Hungarian algorithm (maximize)
+    5. Run Hungarian algorithm (maximize), or transportation LP when
+       settings.ASSIGNMENT_SOLVER == 'transportation'
     6. Post-process: remove impossible assignments (-9999)
     7. Filter overlapping assignments per guard (keep highest scores)
     8. For freed positions, re-run with remaining guard slots
@@ -277,12 +493,15 @@ def assign_positions_automatically(settings, availability_caps=None):
     Returns:
         dict: Assignment results summary
     """
+    from django.conf import settings as django_settings
     from background_tasks.tasks import get_guards_with_availability_updated
     from api.api_models.schedule import Position, PositionHistory
     
     if availability_caps is None:
         availability_caps = {}
     
+    use_transportation = django_settings.ASSIGNMENT_SOLVER == 'transportation'
+    
     logger.info("=" * 60)
     logger.info("Starting automated position assignment")
     logger.info("=" * 60)
@@ -314,6 +533,10 @@ def assign_positions_automatically(settings, availability_caps=None):
     
     # Track assigned positions per guard to check overlaps
     guard_assigned_positions = defaultdict(list)  # {guard_id: [position objects]}
+    guard_assigned_indices = defaultdict(list)  # {guard_id: [position indices]}
+    
+    # Packed time keys for vectorized overlap masking
+    start_keys, end_keys = (np.array(keys, dtype=np.int64) for keys in position_time_keys(positions))
     
     iteration = 0
     max_iterations = 10  # Safety limit
@@ -354,18 +577,23 @@ def assign_positions_automatically(settings, availability_caps=None):
             score_matrix[:, pos_idx] = -9999
         
         # Additionally, mask positions that would overlap with already-assigned positions
-        # for each guard
+        # for each guard (guard's rows are consecutive in the matrix)
+        guard_rows = defaultdict(list)
         for row_idx, guard in enumerate(row_to_guard_map):
-            for pos_idx, position in enumerate(positions):
-                if score_matrix[row_idx, pos_idx] == -9999:
-                    continue  # Already masked
-                
-                # Check if this position overlaps with any already-assigned position
-                # for this guard
-                for assigned_pos in guard_assigned_positions[guard.id]:
-                    if positions_overlap(position, assigned_pos):
-                        score_matrix[row_idx, pos_idx] = -9999
-                        break
+            guard_rows[guard.id].append(row_idx)
+        
+        for guard_id, rows in guard_rows.items():
+            assigned_indices = guard_assigned_indices[guard_id]
+            if not assigned_indices:
+                continue
+            
+            overlapping = np.zeros(len(positions), dtype=bool)
+            for assigned_idx in assigned_indices:
+                overlapping |= (
+                    (start_keys < end_keys[assigned_idx]) &
+                    (start_keys[assigned_idx] < end_keys)
+                )
+            score_matrix[rows[0]:rows[-1] + 1, overlapping] = -9999
         
         # Check if any valid scores remain
         valid_count = np.sum(score_matrix != -9999)
@@ -373,8 +601,24 @@ def assign_positions_automatically(settings, availability_caps=None):
             logger.info("No valid assignments remaining - stopping")
             break
         
-        # Run Hungarian algorithm
-        row_indices, position_indices = linear_sum_assignment(score_matrix, maximize=True)
+        if use_transportation:
+            # Guard capacities are LP constraints - duplicated rows are only read once
+            row_indices, position_indices = solve_transportation(score_matrix, guard_rows)
+        else:
+            # A guard can't fill more slots than positions still valid for them -
+            # extra rows are identical copies that only grow the Hungarian problem
+            keep_rows = np.zeros(len(row_to_guard_map), dtype=bool)
+            for rows in guard_rows.values():
+                valid_positions = np.count_nonzero(score_matrix[rows[0]] != -9999)
+                keep_rows[rows[0]:rows[0] + min(len(rows), valid_positions)] = True
+            
+            if not keep_rows.all():
+                logger.debug(f"Trimmed score matrix to {keep_rows.sum()}/{len(keep_rows)} slot rows")
+                score_matrix = score_matrix[keep_rows]
+                row_to_guard_map = [guard for guard, keep in zip(row_to_guard_map, keep_rows) if keep]
+            
+            # Run Hungarian algorithm (independently per connected component)
+            row_indices, position_indices = solve_assignment(score_matrix)
         
         # Collect valid assignments from this iteration
         iteration_assignments = []
@@ -431,6 +675,7 @@ def assign_positions_automatically(settings, availability_caps=None):
             assigned_position_indices.add(pos_idx)
             guard_slots_used[guard.id] += 1
             guard_assigned_positions[guard.id].append(position)
+            guard_assigned_indices[guard.id].append(pos_idx)
             new_assignments_count += 1
         
         logger.info(f"Iteration {iteration}: {new_assignments_count} new assignments")
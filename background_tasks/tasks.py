@@ -1,6 +1,6 @@
 from celery import shared_task
 from django.utils import timezone
-from datetime import timedelta, time
+from datetime import date, timedelta, time
 from api.api_models import Exhibition, Position, SystemSettings, NonWorkingDay, Report, Point, AdminNotification, PositionHistory
 from django.core.mail import send_mail
 from django.conf import settings
@@ -10,6 +10,15 @@ import structlog
 logger = structlog.get_logger(__name__)
 
 
+def _now():
+    """
+    Current time as seen by the tasks.
+    
+    Tests patch this one function instead of freezing the clock everywhere.
+    """
+    return timezone.now()
+
+
 @shared_task
 def shift_weekly_periods():
     """
@@ -30,7 +39,7 @@ def shift_weekly_periods():
         logger.info(f"Shifted next_week to this_week: {settings.this_week_start} to {settings.this_week_end}")
     else:
         # First run - initialize this_week to current week
-        today = timezone.now().date()
+        today = _now().date()
         days_since_monday = today.weekday()  # Monday=0
         settings.this_week_start = today - timedelta(days=days_since_monday)
         settings.this_week_end = settings.this_week_start + timedelta(days=6)
@@ -199,17 +208,21 @@ def update_all_guard_priorities():
     sys_settings = SystemSettings.load()
     weeks_to_consider = sys_settings.points_life_weeks
     
-    now = timezone.localtime(timezone.now())
+    now = timezone.localtime(_now())
     # Always use this week's Monday 00:00 as cycle_start, regardless of when task runs
     days_since_monday = now.weekday()  # Monday=0, Tuesday=1, ...
     cycle_start = (now - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
     
-    guards = Guard.active_guards.all()
+    # calculate_guard_priority reads guard.user (date_joined, username) - join it
+    guards = Guard.active_guards.select_related('user')
+    
+    # Weekly point totals of all guards in one query, shared by every guard below
+    point_totals = get_weekly_point_totals(cycle_start, weeks_to_consider)
     
     for guard in guards:
-        priority = calculate_guard_priority(guard, cycle_start, weeks_to_consider)
+        priority = calculate_guard_priority(guard, cycle_start, weeks_to_consider, point_totals)
         guard.priority_number = priority
-        guard.save()
+        guard.save(update_fields=['priority_number'])
         logger.info(f"Updated priority for {guard.user.username}: {priority}")
     
     logger.info(f"Updated priorities for {guards.count()} guards")
@@ -309,8 +322,27 @@ def validate_preference_templates():
     invalidated_day_count = 0
     invalidated_work_period_count = 0
     
+    # Notifications expire at end of configuration period - only relevant during
+    # configuration window. Same for every invalidated template, so computed once.
+    expires_at = settings.config_end_datetime
+    if expires_at is None:
+        # Fallback: expires in 3 days if config_end_datetime not available
+        expires_at = _now() + timedelta(days=3)
+    
+    # Many templates are created in the same week - compute each week's set only once
+    exhibitions_by_week = {}
+    workdays_by_week = {}
+    
+    # Get current next_week exhibition set
+    current_exhibitions = _get_exhibitions_for_week(
+        settings.next_week_start,
+        settings.next_week_end
+    )
+    
     # Validate Exhibition Preference Templates
-    exhibition_templates = GuardExhibitionPreference.objects.filter(is_template=True)
+    exhibition_templates = GuardExhibitionPreference.objects.filter(
+        is_template=True
+    ).select_related('guard__user')
     
     for pref in exhibition_templates:
         # Get historical exhibition set from created_at week
@@ -318,27 +350,18 @@ def validate_preference_templates():
         week_start, week_end = _get_week_from_datetime(pref.created_at)
         week_start = week_start + timedelta(days=7)
         week_end = week_end + timedelta(days=7)
-        historical_exhibitions = _get_exhibitions_for_week(week_start, week_end)
-        
-        # Get current next_week exhibition set
-        current_exhibitions = _get_exhibitions_for_week(
-            settings.next_week_start,
-            settings.next_week_end
-        )
+        if week_start not in exhibitions_by_week:
+            exhibitions_by_week[week_start] = _get_exhibitions_for_week(week_start, week_end)
+        historical_exhibitions = exhibitions_by_week[week_start]
         
         # Compare sets
         if historical_exhibitions != current_exhibitions:
             # Invalidate template - set next_week_start to current week to satisfy validation
             pref.is_template = False
             pref.next_week_start = settings.next_week_start
-            pref.save()
+            pref.save(update_fields=['is_template', 'next_week_start'])
             
             # Notify guard (system-generated, unicast notification)
-            # Expires at end of configuration period - only relevant during configuration window
-            expires_at = settings.config_end_datetime
-            if expires_at is None:
-                # Fallback: expires in 3 days if config_end_datetime not available
-                expires_at = timezone.now() + timedelta(days=3)
             AdminNotification.objects.create(
                 cast_type=AdminNotification.CAST_UNICAST,
                 to_user=pref.guard.user,
@@ -356,8 +379,16 @@ def validate_preference_templates():
                 f"historical={sorted(historical_exhibitions)}, current={sorted(current_exhibitions)}"
             )
     
+    # Get current next_week workday set
+    current_days = _get_workdays_for_week(
+        settings.next_week_start,
+        settings.next_week_end
+    )
+    
     # Validate Day Preference Templates
-    day_templates = GuardDayPreference.objects.filter(is_template=True)
+    day_templates = GuardDayPreference.objects.filter(
+        is_template=True
+    ).select_related('guard__user')
     
     for pref in day_templates:
         # Get historical workday set from created_at week
@@ -365,26 +396,18 @@ def validate_preference_templates():
         week_start, week_end = _get_week_from_datetime(pref.created_at)
         week_start = week_start + timedelta(days=7)
         week_end = week_end + timedelta(days=7)
-        historical_days = _get_workdays_for_week(week_start, week_end)
-        
-        # Get current next_week workday set
-        current_days = _get_workdays_for_week(
-            settings.next_week_start,
-            settings.next_week_end
-        )
+        if week_start not in workdays_by_week:
+            workdays_by_week[week_start] = _get_workdays_for_week(week_start, week_end)
+        historical_days = workdays_by_week[week_start]
         
         # Compare sets
         if historical_days != current_days:
             # Invalidate template - set next_week_start to current week to satisfy validation
             pref.is_template = False
             pref.next_week_start = settings.next_week_start
-            pref.save()
+            pref.save(update_fields=['is_template', 'next_week_start'])
             
             # Notify guard (system-generated, unicast notification)
-            # Expires at end of configuration period - only relevant during configuration window
-            expires_at = settings.config_end_datetime
-            if expires_at is None:
-                expires_at = timezone.now() + timedelta(days=3)
             AdminNotification.objects.create(
                 cast_type=AdminNotification.CAST_UNICAST,
                 to_user=pref.guard.user,
@@ -425,11 +448,19 @@ def validate_preference_templates():
     
     # Group by guard
     templates_by_guard = defaultdict(list)
-    for wp in work_period_templates:
+    for wp in work_period_templates.select_related('guard__user'):
         templates_by_guard[wp.guard].append(wp)
     
     carried_forward_count = 0
     
+    # Get available periods for next_week (current)
+    current_periods = _get_available_work_periods_for_week(
+        settings.next_week_start,
+        settings.next_week_end,
+        settings
+    )
+    periods_by_week = {}
+    
     for guard, work_periods in templates_by_guard.items():
         # Get the next_week_start from the template (what week it was created for)
         first_wp = work_periods[0]
@@ -437,16 +468,13 @@ def validate_preference_templates():
         template_week_end = template_week_start + timedelta(days=6)
         
         # Get available periods for the template's week (historical)
-        historical_periods = _get_available_work_periods_for_week(
-            template_week_start,
-            template_week_end
-        )
-        
-        # Get available periods for next_week (current)
-        current_periods = _get_available_work_periods_for_week(
-            settings.next_week_start,
-            settings.next_week_end
-        )
+        if template_week_start not in periods_by_week:
+            periods_by_week[template_week_start] = _get_available_work_periods_for_week(
+                template_week_start,
+                template_week_end,
+                settings
+            )
+        historical_periods = periods_by_week[template_week_start]
         
         # Compare sets
         if historical_periods == current_periods:
@@ -464,7 +492,7 @@ def validate_preference_templates():
             # 2. Set old templates to is_template=False (they keep their original next_week_start)
             for wp in work_periods:
                 wp.is_template = False
-                wp.save()
+                wp.save(update_fields=['is_template'])
             
             carried_forward_count += 1
             logger.info(
@@ -475,12 +503,9 @@ def validate_preference_templates():
             # Conditions don't match - invalidate template (no copy for next_week)
             for wp in work_periods:
                 wp.is_template = False
-                wp.save()
+                wp.save(update_fields=['is_template'])
             
             # Notify guard
-            expires_at = settings.config_end_datetime
-            if expires_at is None:
-                expires_at = timezone.now() + timedelta(days=3)
             AdminNotification.objects.create(
                 cast_type=AdminNotification.CAST_UNICAST,
                 to_user=guard.user,
@@ -501,14 +526,14 @@ def validate_preference_templates():
     
     # Handle legacy templates (NULL next_week_start) - just invalidate them
     legacy_templates_by_guard = defaultdict(list)
-    for wp in legacy_templates:
+    for wp in legacy_templates.select_related('guard__user'):
         legacy_templates_by_guard[wp.guard].append(wp)
     
     for guard, work_periods in legacy_templates_by_guard.items():
         for wp in work_periods:
             wp.is_template = False
             wp.next_week_start = settings.this_week_start  # Assign to current week
-            wp.save()
+            wp.save(update_fields=['is_template', 'next_week_start'])
         
         invalidated_work_period_count += 1
         logger.info(
@@ -548,9 +573,10 @@ def _get_week_from_datetime(dt):
     Returns:
         tuple: (week_start_date, week_end_date) - Monday and Sunday
     """
-    week_start = dt.date() - timedelta(days=dt.weekday())  # Monday
-    week_end = week_start + timedelta(days=6)  # Sunday
-    return week_start, week_end
+    # Ordinal 1 (0001-01-01) is a Monday, so (ordinal - 1) % 7 is the weekday
+    ordinal = dt.toordinal()
+    monday = ordinal - (ordinal - 1) % 7
+    return date.fromordinal(monday), date.fromordinal(monday + 6)
 
 
 def _get_exhibitions_for_week(week_start, week_end):
@@ -564,12 +590,13 @@ def _get_exhibitions_for_week(week_start, week_end):
     Returns:
         set: Set of exhibition IDs
     """
-    exhibitions = Exhibition.objects.filter(
-        positions__date__gte=week_start,
-        positions__date__lte=week_end
-    ).distinct().values_list('id', flat=True)
+    # Read the FK column straight from Position - no join with Exhibition needed
+    exhibition_ids = Position.objects.filter(
+        date__gte=week_start,
+        date__lte=week_end
+    ).values_list('exhibition_id', flat=True).distinct()
     
-    return set(exhibitions)
+    return set(exhibition_ids)
 
 
 def _get_workdays_for_week(week_start, week_end):
@@ -593,7 +620,7 @@ def _get_workdays_for_week(week_start, week_end):
     return workdays
 
 
-def _get_available_work_periods_for_week(week_start, week_end):
+def _get_available_work_periods_for_week(week_start, week_end, settings=None):
     """
     Get set of (day_of_week, shift_type) tuples that are available in given week.
     
@@ -604,40 +631,40 @@ def _get_available_work_periods_for_week(week_start, week_end):
     Args:
         week_start: Date of Monday
         week_end: Date of Sunday
+        settings: Already loaded SystemSettings (loaded here if not given)
     
     Returns:
         set: Set of (day_of_week, shift_type) tuples
         Example: {(0, 'morning'), (0, 'afternoon'), (1, 'morning'), ...}
     """
-    settings = SystemSettings.get_active()
-    
-    # Get all positions in this week
-    positions = Position.objects.filter(
-        date__gte=week_start,
-        date__lte=week_end
-    ).values('date', 'start_time').distinct()
+    if settings is None:
+        settings = SystemSettings.get_active()
+    
+    # Shift of each start time, per weekday/weekend (morning wins if times coincide)
+    shift_types = {
+        False: {
+            settings.weekday_afternoon_start: 'afternoon',
+            settings.weekday_morning_start: 'morning',
+        },
+        True: {
+            settings.weekend_afternoon_start: 'afternoon',
+            settings.weekend_morning_start: 'morning',
+        },
+    }
+    
+    # Distinct (date, start_time) pairs of this week - plain tuples, no model instances
+    rows = Position.objects.filter(
+        date__range=(week_start, week_end)
+    ).values_list('date', 'start_time').distinct()
     
     available_periods = set()
     
-    for pos in positions:
-        day_of_week = pos['date'].weekday()
-        start_time = pos['start_time']
-        
-        # Determine if morning or afternoon based on start_time
+    for position_date, start_time in rows:
+        day_of_week = position_date.weekday()
         is_weekend = day_of_week in [5, 6]  # Saturday=5, Sunday=6
         
-        if is_weekend:
-            morning_start = settings.weekend_morning_start
-            afternoon_start = settings.weekend_afternoon_start
-        else:
-            morning_start = settings.weekday_morning_start
-            afternoon_start = settings.weekday_afternoon_start
-        
-        if start_time == morning_start:
-            shift_type = 'morning'
-        elif start_time == afternoon_start:
-            shift_type = 'afternoon'
-        else:
+        shift_type = shift_types[is_weekend].get(start_time)
+        if shift_type is None:
             # Unknown shift - skip
             continue
         
@@ -646,7 +673,70 @@ def _get_available_work_periods_for_week(week_start, week_end):
     return available_periods
 
 
-def calculate_guard_priority(guard, cycle_start, weeks_to_consider):
+def get_weekly_point_totals(cycle_start, weeks_to_consider):
+    """
+    Sum points per guard per week for the last weeks_to_consider weeks in one query.
+    
+    Week i spans [cycle_start - (i+1) weeks, cycle_start - i weeks), same as in
+    calculate_guard_priority (i=0: last week). Points of all guards are included,
+    so the result also serves averages over other guards.
+    
+    Args:
+        cycle_start: Datetime of current cycle start (Monday 00:00)
+        weeks_to_consider: Number of weeks to look back
+    
+    Returns:
+        dict: {guard_id: {week_index: total_points}} - weeks without points are missing
+    """
+    from django.db.models import Case, IntegerField, Sum, Value, When
+    
+    if weeks_to_consider <= 0:
+        return {}
+    
+    week_cases = [
+        When(
+            date_awarded__gte=cycle_start - timedelta(days=(i + 1) * 7),
+            date_awarded__lt=cycle_start - timedelta(days=i * 7),
+            then=Value(i)
+        )
+        for i in range(weeks_to_consider)
+    ]
+    
+    rows = Point.objects.filter(
+        date_awarded__gte=cycle_start - timedelta(days=weeks_to_consider * 7),
+        date_awarded__lt=cycle_start
+    ).annotate(
+        week=Case(*week_cases, output_field=IntegerField())
+    ).values('guard_id', 'week').annotate(
+        total=Sum('points')
+    ).order_by()
+    
+    point_totals = {}
+    for row in rows:
+        point_totals.setdefault(row['guard_id'], {})[row['week']] = row['total']
+    
+    return point_totals
+
+
+def _average_points_from_totals(point_totals, excluded_guard_id, week_index):
+    """
+    Average points of all guards except excluded_guard_id in one week of point_totals.
+    
+    Used by calculate_guard_priority for weeks before a guard existed, and by
+    get_average_points_for_week for a single arbitrary week.
+    """
+    week_totals = [
+        totals[week_index] for guard_id, totals in point_totals.items()
+        if guard_id != excluded_guard_id and week_index in totals
+    ]
+    
+    if not week_totals:
+        return Decimal('0.0')
+    
+    return Decimal(str(sum(week_totals))) / len(week_totals)
+
+
+def calculate_guard_priority(guard, cycle_start, weeks_to_consider, point_totals=None):
     """
     Calculate weighted priority for a single guard based on points history.
     
@@ -654,13 +744,17 @@ def calculate_guard_priority(guard, cycle_start, weeks_to_consider):
         guard: Guard instance
         cycle_start: Datetime of current cycle start (Monday 00:00)
         weeks_to_consider: Number of weeks to look back (from SystemSettings)
+        point_totals: Optional result of get_weekly_point_totals for the same
+                      cycle_start/weeks_to_consider (shared when updating all guards).
+                      Fetched here if not given.
     
     Returns:
         Decimal: Calculated priority number
     """
-    from api.api_models.user_type import Guard
-    from django.db.models import Sum
+    if point_totals is None:
+        point_totals = get_weekly_point_totals(cycle_start, weeks_to_consider)
     
+    guard_totals = point_totals.get(guard.id, {})
     weighted_sum = Decimal('0.0')
     
     for i in range(weeks_to_consider):
@@ -670,12 +764,8 @@ def calculate_guard_priority(guard, cycle_start, weeks_to_consider):
         week_end = cycle_start - timedelta(days=i * 7)
         week_start = week_end - timedelta(days=7)
         
-        # Get points for this guard in this week
-        points_this_week = Point.objects.filter(
-            guard=guard,
-            date_awarded__gte=week_start,
-            date_awarded__lt=week_end
-        ).aggregate(total=Sum('points'))['total']
+        # Points for this guard in this week
+        points_this_week = guard_totals.get(i)
         
         # Check if guard existed during this week
         guard_created = guard.user.date_joined
@@ -688,7 +778,7 @@ def calculate_guard_priority(guard, cycle_start, weeks_to_consider):
                 logger.debug(f"Guard {guard.user.username} existed in week but earned 0 points")
             else:
                 # Guard didn't exist yet - use average of other guards
-                points_this_week = get_average_points_for_week(guard, week_start, week_end)
+                points_this_week = _average_points_from_totals(point_totals, guard.id, i)
                 logger.debug(f"Guard {guard.user.username} didn't exist yet, using average: {points_this_week}")
         
         # Apply weight factor with gradual decay: i=0 → 1.0, i=1 → 1.2, i=2 → 1.4, etc.
@@ -708,7 +798,8 @@ def calculate_guard_priority(guard, cycle_start, weeks_to_consider):
 def get_average_points_for_week(excluded_guard, week_start, week_end):
     """
     Calculate average points earned by all guards (except excluded_guard) in given week.
-    Used for new guards who don't have points history.
+    Same average calculate_guard_priority uses for weeks before a guard existed,
+    for any week range and without a shared get_weekly_point_totals result.
     
     Args:
         excluded_guard: Guard to exclude from average calculation
@@ -718,31 +809,22 @@ def get_average_points_for_week(excluded_guard, week_start, week_end):
     Returns:
         Decimal: Average points for this week, or 0 if no data
     """
-    from api.api_models.user_type import Guard
-    from django.db.models import Sum, Count
+    from django.db.models import Sum
     
-    # Get all guards who have points in this week (excluding current guard)
-    guards_with_points = Point.objects.filter(
+    # This week's total of every other guard, in the shape of get_weekly_point_totals
+    # (single week at index 0), so the average has only one implementation
+    rows = Point.objects.filter(
         date_awarded__gte=week_start,
         date_awarded__lt=week_end
     ).exclude(
         guard=excluded_guard
-    ).values('guard').annotate(
+    ).values('guard_id').annotate(
         total=Sum('points')
-    )
-    
-    if not guards_with_points:
-        return Decimal('0.0')
+    ).order_by()
     
-    total_points = sum(g['total'] for g in guards_with_points)
-    avg_points = Decimal(str(total_points)) / len(guards_with_points)
+    point_totals = {row['guard_id']: {0: row['total']} for row in rows}
     
-    logger.debug(
-        f"Average points for week {week_start.date()} to {week_end.date()}: "
-        f"{avg_points} (from {len(guards_with_points)} guards)"
-    )
-    
-    return avg_points
+    return _average_points_from_totals(point_totals, excluded_guard.id, 0)
 
 
 @shared_task
@@ -851,13 +933,17 @@ def get_guards_with_availability_updated():
         logger.warning("Configuration period not properly set in SystemSettings")
         return Guard.objects.none()
     
-    # Get guards who updated availability in this configuration period
+    # Get guards who updated availability in this configuration period.
+    # Of the joined user only username is read (logging), so the rest of the
+    # User row (password hash, names, email, timestamps) is deferred.
     eligible_guards = Guard.active_guards.filter(
         availability__isnull=False,
         availability__gt=0,
         availability_updated_at__gte=config_start,
         availability_updated_at__lte=config_end
-    ).select_related('user').order_by('-priority_number')
+    ).select_related('user').only(
+        'priority_number', 'availability', 'availability_updated_at', 'user__username'
+    ).order_by('-priority_number')
     
     logger.info(
         f"Found {eligible_guards.count()} guards with availability set between "
@@ -903,20 +989,24 @@ def assign_initial_priority_to_new_guard(guard):
         logger.info(f"Assigned average priority {assigned_priority} to new guard {guard.user.username}")
     
     guard.priority_number = assigned_priority
-    guard.save()
+    guard.save(update_fields=['priority_number'])
     
     return assigned_priority
 
 
 def calculate_availability_caps(eligible_guards, total_positions):
     """
-    Calculate capped availability for each guard using iterative load balancing.
+    Calculate capped availability for each guard using water filling.
     
-    If total demand (sum of availabilities) exceeds supply (positions), iteratively
-    reduce the highest availability values until demand matches supply. When multiple
-    guards have the same max availability, reduce the one with lowest priority_number first.
+    If total demand (sum of availabilities) exceeds supply (positions), the highest
+    availability values are reduced until demand matches supply. When multiple
+    guards have the same max availability, the one with lowest priority_number is
+    reduced first (guards with equal priority are reduced together).
     
-    This is a "water filling" / "iterative capping" algorithm that ensures fair distribution.
+    Instead of lowering the maximum one step at a time, the water level is found
+    directly: the lowest level L at which sum(min(availability, L)) still exceeds
+    supply. Everyone is capped at L, and the remaining excess is removed by
+    lowering guards at L to L-1 in order of increasing priority.
     
     Args:
         eligible_guards: QuerySet of Guard objects with availability set
@@ -932,18 +1022,18 @@ def calculate_availability_caps(eligible_guards, total_positions):
         Guards: A(availability=5, priority=80), B(4, priority=70), C(3, priority=60)
         Total demand: 12 > 10 supply
         
-        Iteration 1: Max=5 (only A), cap A to 4 → 4+4+3=11 (still too much)
-        Iteration 2: Max=4 (A and B), B has lower priority, cap B to 3 → 4+3+3=10 (fits!)
+        Level 4: min(a, 4) sums to 4+4+3=11 > 10, level 3 would give 9 - so L=4
+        Excess 1 at level 4 (A and B), B has lower priority, cap B to 3 → 4+3+3=10
         
         Returns: {A_id: 4, B_id: 3, C_id: 3}
     """
-    from api.api_models.user_type import Guard
+    import numpy as np
     
-    # Initialize caps with original availability
-    caps = {guard.id: guard.availability for guard in eligible_guards}
+    guards = list(eligible_guards)
+    availability = np.fromiter((g.availability for g in guards), dtype=np.int64, count=len(guards))
     
     # Calculate total demand
-    total_demand = sum(caps.values())
+    total_demand = int(availability.sum())
     
     if total_demand <= total_positions:
         # Everyone can work their desired amount - no capping needed
@@ -951,67 +1041,43 @@ def calculate_availability_caps(eligible_guards, total_positions):
             f"No capping needed: demand={total_demand}, supply={total_positions}. "
             f"All guards can work their requested availability."
         )
-        return caps
+        return {g.id: g.availability for g in guards}
     
-    # Need to cap - iteratively reduce highest values
     logger.info(
         f"Capping needed: demand={total_demand}, number of positions={total_positions}. "
-        f"Starting iterative reduction..."
+        f"Finding water level..."
     )
     
-    # Create priority lookup (lower number = worse priority, gets capped first)
-    guard_priorities = {guard.id: guard.priority_number for guard in eligible_guards}
-    
-    iteration = 0
-    while sum(caps.values()) > total_positions:
-        iteration += 1
-        current_demand = sum(caps.values())
-        
-        # Find maximum cap value
-        max_cap = max(caps.values())
-        
-        # Find all guards at this maximum
-        guards_at_max = [gid for gid, cap in caps.items() if cap == max_cap]
-        
-        if len(guards_at_max) > 1:
-            # Multiple guards at max - find lowest priority among them
-            min_priority = min(guard_priorities[gid] for gid in guards_at_max)
-            
-            # Get ALL guards with this lowest priority (might be multiple with same priority)
-            guards_to_cap = [gid for gid in guards_at_max 
-                           if guard_priorities[gid] == min_priority]
-            
-            logger.debug(
-                f"Iteration {iteration}: {len(guards_at_max)} guards at max={max_cap}. "
-                f"Reducing {len(guards_to_cap)} guard(s) with lowest priority={min_priority:.2f}"
-            )
-        else:
-            # Only one guard at max
-            guards_to_cap = guards_at_max
-            logger.debug(
-                f"Iteration {iteration}: Single guard at max={max_cap}. "
-                f"Reducing guard {guards_to_cap[0]}"
-            )
-        
-        # Reduce all selected guards by 1
-        for gid in guards_to_cap:
-            caps[gid] -= 1
-        
-        logger.debug(
-            f"After iteration {iteration}: demand reduced from {current_demand} to {sum(caps.values())}"
-        )
+    # Demand at every integer level: sum(min(a, L)) = sum of a below L + L * (guards at or above L)
+    sorted_availability = np.sort(availability)
+    prefix = np.concatenate(([0], np.cumsum(sorted_availability)))
+    levels = np.arange(sorted_availability[-1] + 1)
+    below = np.searchsorted(sorted_availability, levels, side='right')
+    demand_at_level = prefix[below] + (len(guards) - below) * levels
+    
+    # Lowest level whose demand still exceeds supply
+    level = int(np.argmax(demand_at_level > total_positions))
+    excess = int(demand_at_level[level]) - total_positions
+    caps = np.minimum(availability, level)
+    
+    # Lower guards at the level by one, lowest priority group first, until excess is gone
+    at_level = np.flatnonzero(availability >= level)
+    priorities = np.fromiter(
+        (float(guards[i].priority_number) for i in at_level), dtype=np.float64, count=len(at_level)
+    )
+    group_priorities, group_sizes = np.unique(priorities, return_counts=True)
+    groups_needed = int(np.searchsorted(np.cumsum(group_sizes), excess)) + 1
+    caps[at_level[priorities <= group_priorities[groups_needed - 1]]] -= 1
     
-    final_demand = sum(caps.values())
-    capped_count = sum(1 for gid, cap in caps.items() 
-                       if cap < {guard.id: guard.availability for guard in eligible_guards}[gid])
+    capped_count = int(np.count_nonzero(caps < availability))
     
     logger.info(
-        f"Capping complete after {iteration} iterations. "
-        f"Final demand: {final_demand}, supply: {total_positions}. "
+        f"Capping complete at level {level}. "
+        f"Final demand: {int(caps.sum())}, supply: {total_positions}. "
         f"{capped_count} guards capped from original availability."
     )
     
-    return caps
+    return {g.id: int(cap) for g, cap in zip(guards, caps)}
 
 
 @shared_task
@@ -1027,27 +1093,36 @@ def award_daily_completions():
     from api.api_models.user_type import Guard
     
     settings = SystemSettings.get_active()
-    now = timezone.now()
+    now = _now()
     today = now.date()
     
     logger.info(f"Starting daily completion awards for {today}")
     
     # Find all positions from today (by 23:00, all shifts have ended)
-    positions_today = Position.objects.filter(date=today)
+    positions_today = list(Position.objects.filter(date=today).select_related('exhibition'))
     
-    if not positions_today.exists():
+    if not positions_today:
         logger.info(f"No positions found for {today}")
         return f"No positions found for {today}"
     
-    awards_given = 0
+    # Latest history of every position in one query (first row per position wins)
+    histories = (
+        PositionHistory.objects
+        .filter(position__in=positions_today)
+        .select_related('guard__user')
+        .order_by('position_id', '-action_time', '-id')
+    )
+    latest_by_position = {}
+    for history in histories:
+        if history.position_id not in latest_by_position:
+            latest_by_position[history.position_id] = history
+    
+    new_points = []
     total_points_awarded = Decimal('0.00')
     
     # Check each position to find guards who completed them
     for position in positions_today:
-        # Get latest history for this position
-        latest_history = PositionHistory.objects.filter(
-            position=position
-        ).order_by('-action_time', '-id').first()
+        latest_history = latest_by_position.get(position.id)
         
         # Award only if position was assigned (ASSIGNED or REPLACED or SWAPPED action)
         if latest_history and latest_history.action in [
@@ -1066,16 +1141,19 @@ def award_daily_completions():
                 points = Decimal(str(settings.award_for_position_completion))
                 explanation = f"Odrađena pozicija ({position.exhibition.name}, {position.date})"
             
-            Point.objects.create(
+            new_points.append(Point(
                 guard=guard,
                 points=points,
                 explanation=explanation
-            )
+            ))
             
-            awards_given += 1
             total_points_awarded += points
             logger.debug(f"Awarded {points} points to {guard.user.username} for {position.exhibition.name} on {position.date}")
     
+    # Single INSERT for all awards
+    Point.objects.bulk_create(new_points)
+    awards_given = len(new_points)
+    
     logger.info(
         f"Daily completion awards complete: {awards_given} awards given, "
         f"{total_points_awarded} total points awarded for {today}"
@@ -1095,7 +1173,7 @@ def check_and_penalize_insufficient_positions():
     - AND penalty hasn't been applied yet for this next_week period (checked in DB)
     """
     settings = SystemSettings.get_active()
-    now = timezone.now()
+    now = _now()
     
     # Check if manual assignment period has ended
     manual_end = settings.manual_assignment_end_datetime
@@ -1108,9 +1186,11 @@ def check_and_penalize_insufficient_positions():
         logger.info(f"check_and_penalize: manual period still active. now={now}, manual_end={manual_end}")
         return "Manual assignment period still active"
 
+    # Indexed lookup by reason, week is then matched only among these penalties
     existing_penalties = Point.objects.filter(
-        explanation__icontains=f'pozicija u tjednu {settings.next_week_start}',
-        created_at__gte=manual_end
+        reason=Point.Reason.INSUFFICIENT_POSITIONS,
+        date_awarded__gte=manual_end,
+        explanation__contains=f'pozicija u tjednu {settings.next_week_start}'
     )
 
     if existing_penalties.exists():
@@ -1204,7 +1284,8 @@ def penalize_insufficient_positions(week_start=None, week_end=None, minimal_posi
             Point.objects.create(
                 guard=guard,
                 points=penalty,
-                explanation=explanation
+                explanation=explanation,
+                reason=Point.Reason.INSUFFICIENT_POSITIONS
             )
             
             penalties_given += 1
@@ -1222,6 +1303,33 @@ def penalize_insufficient_positions(week_start=None, week_end=None, minimal_posi
     return f"Penalized {penalties_given} guards for insufficient positions"
 
 
+def _swap_expiry_records(swap_request, penalty):
+    """
+    Unsaved records for one expired swap request.
+    
+    Returns:
+        tuple: (PositionHistory with action='cancelled', penalty Point)
+    """
+    position = swap_request.position_to_swap
+    guard = swap_request.requesting_guard
+    
+    history = PositionHistory(
+        position=position,
+        guard=guard,
+        action=PositionHistory.Action.CANCELLED
+    )
+    point = Point(
+        guard=guard,
+        points=penalty,
+        explanation=(
+            f"Kazna za nedolazak: zahtjev za zamjenu je istekao za "
+            f"{position.exhibition.name}: {position.date.strftime('%d.%m.%Y')} "
+            f"{position.start_time.strftime('%H:%M')}-{position.end_time.strftime('%H:%M')}"
+        )
+    )
+    return history, point
+
+
 @shared_task
 def expire_swap_requests():
     """
@@ -1235,62 +1343,85 @@ def expire_swap_requests():
     Runs periodically (weekday: 11:05, 15:05; weekend: 11:05, 14:35)
     """
     from api.api_models.textual_model import PositionSwapRequest
+    from api.api_models.schedule import _invalidate_schedule_cache_for_dates
     from django.db import transaction
     
-    now = timezone.now()
+    now = _now()
     
     # Find all pending swap requests that should have expired
-    expired_swaps = PositionSwapRequest.objects.filter(
-        status='pending',
-        expires_at__lte=now
+    expired_swaps = list(
+        PositionSwapRequest.objects.filter(
+            status='pending',
+            expires_at__lte=now
+        ).select_related('position_to_swap__exhibition', 'requesting_guard__user')
     )
     
-    expired_count = 0
-    total_penalties = Decimal('0.00')
+    if not expired_swaps:
+        logger.info("Swap request expiration complete: 0 requests expired, 0.00 total penalty points")
+        return "Expired 0 swap requests"
     
-    for swap_request in expired_swaps:
-        try:
-            with transaction.atomic():
-                position = swap_request.position_to_swap
-                guard = swap_request.requesting_guard
-                settings = SystemSettings.get_active()
-                
-                # 1. Update swap request status
-                swap_request.status = 'expired'
-                swap_request.save()
-                
-                # 2. Create PositionHistory (cancelled)
-                PositionHistory.objects.create(
-                    position=position,
-                    guard=guard,
-                    action=PositionHistory.Action.CANCELLED
-                )
-                
-                # 3. Assign penalty (cancellation on position day = strongest penalty)
-                penalty = Decimal(str(settings.penalty_for_position_cancellation_on_the_position_day))
-                
-                Point.objects.create(
-                    guard=guard,
-                    points=penalty,
-                    explanation=(
-                        f"Kazna za nedolazak: zahtjev za zamjenu je istekao za "
-                        f"{position.exhibition.name}: {position.date.strftime('%d.%m.%Y')} "
-                        f"{position.start_time.strftime('%H:%M')}-{position.end_time.strftime('%H:%M')}"
-                    )
-                )
-                
-                expired_count += 1
-                total_penalties += abs(penalty)
-                
-                logger.info(
-                    f"Expired swap request {swap_request.id}: "
-                    f"Guard {guard.user.username} penalized {penalty} points for "
-                    f"position {position.id}"
-                )
-                
-        except Exception as e:
-            logger.error(f"Error expiring swap request {swap_request.id}: {e}")
-            continue
+    # Settings are the same for every request - load them once, not per swap
+    settings = SystemSettings.get_active()
+    # Cancellation on position day = strongest penalty
+    penalty = Decimal(str(settings.penalty_for_position_cancellation_on_the_position_day))
+    
+    try:
+        # One INSERT per table and one UPDATE instead of three queries per request
+        with transaction.atomic():
+            # Lock requests that are still pending - one accepted since the SELECT
+            # above is neither expired nor penalized
+            pending_ids = set(
+                PositionSwapRequest.objects.select_for_update().filter(
+                    pk__in=[swap_request.pk for swap_request in expired_swaps],
+                    status='pending'
+                ).values_list('pk', flat=True)
+            )
+            batch = [swap_request for swap_request in expired_swaps if swap_request.pk in pending_ids]
+            records = [_swap_expiry_records(swap_request, penalty) for swap_request in batch]
+            
+            PositionHistory.objects.bulk_create([history for history, _ in records])
+            Point.objects.bulk_create([point for _, point in records])
+            PositionSwapRequest.objects.filter(
+                pk__in=pending_ids,
+                status='pending'
+            ).update(status='expired')
+        expired = batch
+    except Exception as e:
+        # One bad request must not block the others - retry one by one,
+        # each in its own transaction (as before bulk writes)
+        logger.error(f"Error expiring swap requests in bulk, retrying one by one: {e}")
+        expired = []
+        for swap_request in expired_swaps:
+            try:
+                with transaction.atomic():
+                    # Conditional UPDATE locks the row and skips accepted requests
+                    if not PositionSwapRequest.objects.filter(
+                        pk=swap_request.pk,
+                        status='pending'
+                    ).update(status='expired'):
+                        continue
+                    history, point = _swap_expiry_records(swap_request, penalty)
+                    history.save()
+                    point.save()
+                expired.append(swap_request)
+            except Exception as e:
+                logger.error(f"Error expiring swap request {swap_request.id}: {e}")
+                continue
+    
+    # bulk_create skips PositionHistory post_save - invalidate schedule cache here
+    _invalidate_schedule_cache_for_dates(
+        {swap_request.position_to_swap.date for swap_request in expired}
+    )
+    
+    for swap_request in expired:
+        logger.info(
+            f"Expired swap request {swap_request.id}: "
+            f"Guard {swap_request.requesting_guard.user.username} penalized {penalty} points for "
+            f"position {swap_request.position_to_swap_id}"
+        )
+    
+    expired_count = len(expired)
+    total_penalties = abs(penalty) * expired_count
     
     logger.info(
         f"Swap request expiration complete: {expired_count} requests expired, "
@@ -358,6 +358,14 @@ CELERY_BEAT_SCHEDULE = {
     },
 }
 
+# ===================================
+# AUTOMATED ASSIGNMENT
+# ===================================
+# Solver for guard-position assignment:
+# 'hungarian' - linear_sum_assignment on guard rows duplicated per availability
+# 'transportation' - LP with guard capacities, no row duplication
+ASSIGNMENT_SOLVER = env('ASSIGNMENT_SOLVER', default='hungarian')
+
 # ===================================
 # STRUCTURED LOGGING (Structlog)
 # ===================================